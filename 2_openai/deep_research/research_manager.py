@@ -1,12 +1,39 @@
-from agents import Runner, trace, gen_trace_id
+from agents import Runner, trace, gen_trace_id, custom_span
 from search_agent import search_agent
 from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
 from writer_agent import writer_agent, ReportData
 from email_agent import email_agent
-import asyncio
+from search_executor import SearchExecutor, SearchOutcome
+from search_cache import SearchCache, get_search_cache, SEARCH_CACHE_BYPASS
+from collections import Counter
+from contextlib import aclosing
+from typing import AsyncIterator
+import math
+import os
+
+REPORT_QUORUM = float(os.getenv("REPORT_QUORUM", "1.0"))
 
 class ResearchManager:
 
+    def __init__(
+        self,
+        executor: SearchExecutor | None = None,
+        quorum: float = REPORT_QUORUM,
+        cache: SearchCache | None = None,
+        bypass_cache: bool = SEARCH_CACHE_BYPASS,
+    ):
+        """
+        quorum below 1 is progressive mode: the report is written once that share of the searches have succeeded.
+        bypass_cache skips cached summaries and searches afresh, still storing the new summaries in the cache.
+        """
+        self.executor = executor or SearchExecutor(self.search)
+        self.quorum = quorum
+        self.cache = cache
+        self.bypass_cache = bypass_cache
+        self.cache_results = Counter()
+        # Queries this run already looked up and missed, with their embedding, so an executor retry isn't counted again
+        self.cache_misses = {}
+
     async def run(self, query: str):
         """ Run the deep research process, yielding the status updates and the final report"""
         trace_id = gen_trace_id()
@@ -16,8 +43,15 @@ class ResearchManager:
             print("Starting research...")
             search_plan = await self.plan_searches(query)
             yield "Searches planned, starting to search..."     
-            search_results = await self.perform_searches(search_plan)
-            yield "Searches complete, writing report..."
+            outcomes = []
+            async with aclosing(self.perform_searches(search_plan)) as searches:
+                async for outcome in searches:
+                    outcomes.append(outcome)
+                    yield self.search_progress(outcomes, len(search_plan.searches))
+            self.report_cache_hits()
+            search_results = [outcome.summary for outcome in outcomes if outcome.summary]
+            failed = sum(1 for outcome in outcomes if not outcome.summary)
+            yield f"Searches complete ({len(search_results)} summaries{f', {failed} failed' if failed else ''}), writing report..."
             report = await self.write_report(query, search_results)
             yield "Report written, sending email..."
             await self.send_email(report)
@@ -35,32 +69,88 @@ class ResearchManager:
         print(f"Will perform {len(result.final_output.searches)} searches")
         return result.final_output_as(WebSearchPlan)
 
-    async def perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
-        """ Perform the searches to perform for the query """
+    async def perform_searches(self, search_plan: WebSearchPlan) -> AsyncIterator[SearchOutcome]:
+        """ Perform the searches for the query, yielding each outcome as it completes; in progressive mode, stop once a quorum has succeeded """
         print("Searching...")
+        total = len(search_plan.searches)
+        needed = math.ceil(total * self.quorum)
         num_completed = 0
-        tasks = [asyncio.create_task(self.search(item)) for item in search_plan.searches]
-        results = []
-        for task in asyncio.as_completed(tasks):
-            result = await task
-            if result is not None:
-                results.append(result)
-            num_completed += 1
-            print(f"Searching... {num_completed}/{len(tasks)} completed")
+        num_succeeded = 0
+        async with aclosing(self.executor.run(search_plan.searches)) as outcomes:
+            async for outcome in outcomes:
+                num_completed += 1
+                if outcome.summary:
+                    num_succeeded += 1
+                else:
+                    print(f"Search for {outcome.item.query} failed after {outcome.attempts} attempts: {outcome.error}")
+                print(f"Searching... {num_completed}/{total} completed")
+                yield outcome
+                if num_succeeded >= needed and num_completed < total:
+                    print(f"Quorum of {needed}/{total} searches reached, writing the report")
+                    break
         print("Finished searching")
-        return results
 
-    async def search(self, item: WebSearchItem) -> str | None:
-        """ Perform a search for the query """
+    def search_progress(self, outcomes: list[SearchOutcome], total: int) -> str:
+        """ Markdown of the summaries so far, streamed to the UI while the other searches run """
+        lines = [f"Searching... {len(outcomes)}/{total} completed\n"]
+        for outcome in outcomes:
+            if outcome.summary:
+                lines.append(f"**{outcome.item.query}**\n\n{outcome.summary}\n")
+            else:
+                lines.append(f"**{outcome.item.query}**: failed after {outcome.attempts} attempts ({outcome.error})\n")
+        return "\n".join(lines)
+
+    def search_cache(self) -> SearchCache:
+        if self.cache is None:
+            self.cache = get_search_cache()
+        return self.cache
+
+    def search_context_size(self) -> str:
+        return getattr(search_agent.tools[0], "search_context_size", "medium")
+
+    async def search(self, item: WebSearchItem) -> str:
+        """ Return the cached summary for the query if there is one, otherwise search the web and cache the summary """
+        cache = self.search_cache()
+        context_size = self.search_context_size()
+        with custom_span("Search cache", data={"query": item.query, "context_size": context_size}) as span:
+            if item.query in self.cache_misses:
+                summary, kind, vector = None, "retry", self.cache_misses[item.query]
+            else:
+                summary, kind, vector = None, "bypassed", None
+                if not self.bypass_cache:
+                    summary, kind, vector = await cache.get(item.query, context_size)
+                self.cache_results[kind] += 1
+            span.span_data.data["result"] = kind
+            if summary is not None:
+                return summary
+            self.cache_misses[item.query] = vector
+            summary = await self.search_web(item)
+            await cache.put(item.query, context_size, summary, vector)
+            return summary
+
+    def report_cache_hits(self) -> None:
+        """ Record this run's cache hit rate, and the process-wide one, in the trace """
+        if not self.cache_results:
+            return
+        hits = self.cache_results["exact"] + self.cache_results["semantic"]
+        lookups = hits + self.cache_results["miss"]
+        data = {
+            **{f"run_{kind}": count for kind, count in self.cache_results.items()},
+            "run_hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+        if self.cache is not None:
+            data.update({f"total_{key}": value for key, value in self.cache.stats().items()})
+        with custom_span("Search cache hit rate", data=data):
+            print(f"Search cache: {hits}/{lookups} searches answered from the cache")
+
+    async def search_web(self, item: WebSearchItem) -> str:
+        """ Perform a search for the query; errors are left to the executor, which retries them """
         input = f"Search term: {item.query}\nReason for searching: {item.reason}"
-        try:
-            result = await Runner.run(
-                search_agent,
-                input,
-            )
-            return str(result.final_output)
-        except Exception:
-            return None
+        result = await Runner.run(
+            search_agent,
+            input,
+        )
+        return str(result.final_output)
 
     async def write_report(self, query: str, search_results: list[str]) -> ReportData:
         """ Write the report for the query """
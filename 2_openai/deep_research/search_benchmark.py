@@ -0,0 +1,91 @@
+"""
+Benchmark of the deep research search stage against stub searches, so no API calls are made.
+Each stub search takes a random, long-tailed time, and the stub provider rejects searches beyond a rate limit of
+concurrent requests. Reports the time to a finished report, and how many summaries went into it, as the number of
+planned searches grows: for the old unbounded stage, the bounded executor with retries, and progressive mode.
+
+Run with: uv run search_benchmark.py
+"""
+
+import asyncio
+import random
+import time
+from planner_agent import WebSearchItem, WebSearchPlan
+from research_manager import ResearchManager
+from search_executor import SearchExecutor
+from writer_agent import ReportData
+
+SEARCH_COUNTS = [5, 10, 20, 50]
+SEARCH_SECONDS = 0.5
+WRITER_SECONDS = 2.0
+PROVIDER_CONCURRENCY = 8
+TIMEOUT_SECONDS = 2.0
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class StubResearchManager(ResearchManager):
+    def __init__(self, searches: int, executor: SearchExecutor, quorum: float = 1.0):
+        super().__init__(executor, quorum)
+        self.searches = searches
+        self.active = 0
+
+    async def plan_searches(self, query: str) -> WebSearchPlan:
+        return WebSearchPlan(searches=[WebSearchItem(reason="stub", query=f"{query} {i}") for i in range(self.searches)])
+
+    async def search(self, item: WebSearchItem) -> str:
+        self.active += 1
+        try:
+            if self.active > PROVIDER_CONCURRENCY:
+                await asyncio.sleep(0.05)
+                raise RateLimitError("429 Too Many Requests")
+            await asyncio.sleep(random.lognormvariate(0, 0.6) * SEARCH_SECONDS)
+            return f"Summary for {item.query}"
+        finally:
+            self.active -= 1
+
+    async def write_report(self, query: str, search_results: list[str]) -> ReportData:
+        self.used = len(search_results)
+        await asyncio.sleep(WRITER_SECONDS)
+        return ReportData(short_summary="", markdown_report="", follow_up_questions=[])
+
+    async def send_email(self, report: ReportData) -> None:
+        pass
+
+
+def configurations(manager: StubResearchManager) -> dict:
+    search = lambda item: manager.search(item)
+    return {
+        "unbounded": (SearchExecutor(search, concurrency=10**6, timeout=10**6, retries=0), 1.0),
+        "bounded": (SearchExecutor(search, concurrency=5, timeout=TIMEOUT_SECONDS, retries=2, backoff=0.2), 1.0),
+        "progressive 80%": (SearchExecutor(search, concurrency=5, timeout=TIMEOUT_SECONDS, retries=2, backoff=0.2), 0.8),
+    }
+
+
+async def time_to_report(searches: int, name: str) -> tuple[float, int]:
+    manager = StubResearchManager(searches, None)
+    manager.executor, manager.quorum = configurations(manager)[name]
+    start = time.perf_counter()
+    async for _ in manager.run("stub topic"):
+        pass
+    return time.perf_counter() - start, manager.used
+
+
+async def main():
+    random.seed(1)
+    print(f"Stub searches take {SEARCH_SECONDS}s (long-tailed); the provider allows {PROVIDER_CONCURRENCY} at once")
+    print(f"The writer takes {WRITER_SECONDS}s; each cell is seconds to the report (summaries used)")
+    names = list(configurations(StubResearchManager(0, None)))
+    print(f"{'searches':>8}  " + "  ".join(f"{name:>18}" for name in names))
+    for searches in SEARCH_COUNTS:
+        cells = []
+        for name in names:
+            elapsed, used = await time_to_report(searches, name)
+            cells.append(f"{elapsed:>10.2f}s ({used:>2}/{searches:<2})")
+        print(f"{searches:>8}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from openai import AsyncOpenAI
+
+SEARCH_CACHE_DB = os.getenv("SEARCH_CACHE_DB", "search_cache.db")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+SEARCH_CACHE_SIMILARITY = float(os.getenv("SEARCH_CACHE_SIMILARITY", "0"))
+SEARCH_CACHE_BYPASS = os.getenv("SEARCH_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+_cache: Optional["SearchCache"] = None
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case, punctuation and spacing are ignored, so "Latest AI agent frameworks?" and "latest ai  agent frameworks"
+    share an entry. Word order and every word are kept: "flights from Paris to London" is a different search from
+    "flights from London to Paris". Rephrasings are left to the opt-in semantic match.
+    """
+    return " ".join(re.findall(r"\w+", query.casefold()))
+
+
+def unit(vector: List[float]) -> np.ndarray:
+    """Embeddings are stored at unit length, so cosine similarity is a dot product"""
+    values = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(values)
+    return values / norm if norm else values
+
+
+class EmbeddingIndex:
+    """The cached queries' embeddings for one context size, as rows of a matrix scored with one product per lookup"""
+
+    def __init__(self, dimensions: int):
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.matrix = np.empty((0, dimensions), dtype=np.float32)
+        self.expires = np.empty(0)
+
+    def add(self, key: str, vector: np.ndarray, expires: float) -> None:
+        if key in self.rows:
+            row = self.rows[key]
+            self.matrix[row] = vector
+            self.expires[row] = expires
+            return
+        self.rows[key] = len(self.keys)
+        self.keys.append(key)
+        self.matrix = np.vstack([self.matrix, vector])
+        self.expires = np.append(self.expires, expires)
+
+    def purge(self, now: float) -> None:
+        live = self.expires > now
+        if live.all():
+            return
+        self.keys = [key for key, keep in zip(self.keys, live) if keep]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.matrix = self.matrix[live]
+        self.expires = self.expires[live]
+
+    def closest(self, vector: np.ndarray, now: float) -> Optional[Tuple[str, float]]:
+        if not self.keys:
+            return None
+        scores = np.where(self.expires > now, self.matrix @ vector, -1.0)
+        best = int(np.argmax(scores))
+        return self.keys[best], float(scores[best])
+
+
+async def openai_embedding(text: str) -> List[float]:
+    response = await AsyncOpenAI().embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return response.data[0].embedding
+
+
+class SearchCache:
+    """
+    Search summaries shared by every research run, in SQLite so they survive restarts, keyed by the normalized query
+    and the search context size. Entries expire after `ttl` seconds.
+    With a similarity threshold above 0, a query with no exact entry can also be answered by the closest earlier
+    query whose embedding is at least that similar. The embeddings are loaded into memory on the first semantic
+    lookup, and kept up to date by `put`. Expired entries are purged on every `put`.
+    """
+
+    def __init__(
+        self,
+        path: str = SEARCH_CACHE_DB,
+        ttl: float = SEARCH_CACHE_TTL,
+        similarity: float = SEARCH_CACHE_SIMILARITY,
+        embed: Callable[[str], Awaitable[List[float]]] = openai_embedding,
+    ):
+        self.ttl = ttl
+        self.similarity = similarity
+        self.embed = embed
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT NOT NULL,
+                context_size TEXT NOT NULL,
+                query TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                embedding BLOB,
+                expires REAL NOT NULL,
+                PRIMARY KEY (key, context_size)
+            )
+            """
+        )
+        self.conn.execute("DELETE FROM search_cache WHERE expires < ?", (time.time(),))
+        self.conn.commit()
+        self.indexes: Dict[str, EmbeddingIndex] = {}
+        self.hits = Counter()
+        self.misses = 0
+
+    def execute(self, sql: str, parameters: tuple = ()) -> list:
+        with self.lock:
+            rows = self.conn.execute(sql, parameters).fetchall()
+            self.conn.commit()
+        return rows
+
+    async def embedding(self, query: str) -> Optional[np.ndarray]:
+        if self.similarity <= 0:
+            return None
+        try:
+            return unit(await self.embed(query))
+        except Exception as e:
+            print(f"Could not embed {query} for the search cache: {e}")
+            return None
+
+    def index_for(self, context_size: str, dimensions: int) -> EmbeddingIndex:
+        """Called holding the lock, so a concurrent `store` can't land between loading the index and registering it"""
+        if context_size not in self.indexes:
+            index = EmbeddingIndex(dimensions)
+            rows = self.execute(
+                "SELECT key, embedding, expires FROM search_cache WHERE context_size = ? AND embedding IS NOT NULL AND expires > ?",
+                (context_size, time.time()),
+            )
+            for key, blob, expires in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                if len(vector) == dimensions:
+                    index.add(key, vector, expires)
+            self.indexes[context_size] = index
+        return self.indexes[context_size]
+
+    def closest(self, vector: np.ndarray, context_size: str) -> Optional[str]:
+        with self.lock:
+            match = self.index_for(context_size, len(vector)).closest(vector, time.time())
+        if match is None or match[1] < self.similarity:
+            return None
+        rows = self.execute(
+            "SELECT summary FROM search_cache WHERE key = ? AND context_size = ? AND expires > ?",
+            (match[0], context_size, time.time()),
+        )
+        return rows[0][0] if rows else None
+
+    async def get(self, query: str, context_size: str) -> Tuple[Optional[str], str, Optional[np.ndarray]]:
+        """
+        Returns:
+            tuple: (summary or None, how it was found: exact, semantic or miss, the query's embedding if one was made)
+        """
+        rows = await asyncio.to_thread(
+            self.execute,
+            "SELECT summary FROM search_cache WHERE key = ? AND context_size = ? AND expires > ?",
+            (normalize_query(query), context_size, time.time()),
+        )
+        if rows:
+            self.hits["exact"] += 1
+            return rows[0][0], "exact", None
+        vector = await self.embedding(query)
+        if vector is not None:
+            summary = await asyncio.to_thread(self.closest, vector, context_size)
+            if summary is not None:
+                self.hits["semantic"] += 1
+                return summary, "semantic", vector
+        self.misses += 1
+        return None, "miss", vector
+
+    async def put(self, query: str, context_size: str, summary: str, vector: Optional[np.ndarray] = None) -> None:
+        if vector is None:
+            vector = await self.embedding(query)
+        await asyncio.to_thread(self.store, normalize_query(query), context_size, query, summary, vector)
+
+    def store(self, key: str, context_size: str, query: str, summary: str, vector: Optional[np.ndarray]) -> None:
+        now = time.time()
+        expires = now + self.ttl
+        with self.lock:
+            self.conn.execute("DELETE FROM search_cache WHERE expires < ?", (now,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, context_size, query, summary, embedding, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, context_size, query, summary, vector.tobytes() if vector is not None else None, expires),
+            )
+            self.conn.commit()
+            for index in self.indexes.values():
+                index.purge(now)
+            if vector is not None and context_size in self.indexes:
+                self.indexes[context_size].add(key, vector, expires)
+
+    def stats(self) -> dict:
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "exact_hits": self.hits["exact"],
+            "semantic_hits": self.hits["semantic"],
+            "misses": self.misses,
+            "hit_rate": round(sum(self.hits.values()) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def get_search_cache() -> SearchCache:
+    """The cache shared by every research run in this process, opened on first use"""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache()
+    return _cache
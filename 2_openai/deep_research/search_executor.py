@@ -0,0 +1,73 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from planner_agent import WebSearchItem
+
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "5"))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "60"))
+SEARCH_RETRIES = int(os.getenv("SEARCH_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = 2.0
+
+
+@dataclass
+class SearchOutcome:
+    item: WebSearchItem
+    summary: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+
+class SearchExecutor:
+    """
+    Runs the planned searches at most `concurrency` at a time, so a long plan doesn't hit the provider's rate limits
+    all at once. Each attempt has a timeout, and failed or timed-out searches are retried with a backoff.
+    Outcomes are yielded as each search finishes, including the ones that failed, with their error.
+    """
+
+    def __init__(
+        self,
+        search: Callable[[WebSearchItem], Awaitable[str]],
+        concurrency: int = SEARCH_CONCURRENCY,
+        timeout: float = SEARCH_TIMEOUT_SECONDS,
+        retries: int = SEARCH_RETRIES,
+        backoff: float = RETRY_BACKOFF_SECONDS,
+    ):
+        self.search = search
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    async def attempt(self, item: WebSearchItem, semaphore: asyncio.Semaphore) -> SearchOutcome:
+        outcome = SearchOutcome(item=item)
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                outcome.attempts += 1
+                try:
+                    outcome.summary = await asyncio.wait_for(self.search(item), self.timeout)
+                    outcome.error = None
+                    break
+                except asyncio.TimeoutError:
+                    outcome.error = f"timed out after {self.timeout:.0f}s"
+                except Exception as e:
+                    outcome.error = f"{type(e).__name__}: {e}"
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.0))
+        outcome.seconds = time.perf_counter() - start
+        return outcome
+
+    async def run(self, items: list[WebSearchItem]) -> AsyncIterator[SearchOutcome]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.create_task(self.attempt(item, semaphore)) for item in items]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # If the caller stops early, e.g. to write the report once a quorum is in, stop the remaining searches
+            for task in tasks:
+                task.cancel()
@@ -2,25 +2,28 @@ import gradio as gr
 from sidekick import Sidekick
 
 
-async def setup():
-    sidekick = Sidekick()
+async def setup(thread_id):
+    sidekick = Sidekick(thread_id)
     await sidekick.setup()
-    return sidekick
+    return sidekick, await sidekick.get_history(), sidekick.sidekick_id
 
 async def process_message(sidekick, message, success_criteria, history):
-    results = await sidekick.run_superstep(message, success_criteria, history)
-    return results, sidekick
+    async for results in sidekick.stream_superstep(message, success_criteria, history):
+        yield results, sidekick
     
-async def reset():
+async def reset(sidekick):
+    if sidekick:
+        await sidekick.forget()
+        sidekick.cleanup()
     new_sidekick = Sidekick()
     await new_sidekick.setup()
-    return "", "", None, new_sidekick
+    return "", "", None, new_sidekick, new_sidekick.sidekick_id
 
 def free_resources(sidekick):
     print("Cleaning up")
     try:
         if sidekick:
-            sidekick.free_resources()
+            sidekick.cleanup()
     except Exception as e:
         print(f"Exception during cleanup: {e}")
 
@@ -28,6 +31,7 @@ def free_resources(sidekick):
 with gr.Blocks(title="Sidekick", theme=gr.themes.Default(primary_hue="emerald")) as ui:
     gr.Markdown("## Sidekick Personal Co-Worker")
     sidekick = gr.State(delete_callback=free_resources)
+    thread_id = gr.BrowserState(None, storage_key="sidekick_thread_id")
     
     with gr.Row():
         chatbot = gr.Chatbot(label="Sidekick", height=300, type="messages")
@@ -38,13 +42,17 @@ with gr.Blocks(title="Sidekick", theme=gr.themes.Default(primary_hue="emerald"))
             success_criteria = gr.Textbox(show_label=False, placeholder="What are your success critiera?")
     with gr.Row():
         reset_button = gr.Button("Reset", variant="stop")
+        stop_button = gr.Button("Stop", variant="secondary")
         go_button = gr.Button("Go!", variant="primary")
         
-    ui.load(setup, [], [sidekick])
-    message.submit(process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick])
-    success_criteria.submit(process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick])
-    go_button.click(process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick])
-    reset_button.click(reset, [], [message, success_criteria, chatbot, sidekick])
+    ui.load(setup, [thread_id], [sidekick, chatbot, thread_id])
+    runs = [
+        message.submit(process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick]),
+        success_criteria.submit(process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick]),
+        go_button.click(process_message, [sidekick, message, success_criteria, chatbot], [chatbot, sidekick]),
+    ]
+    stop_button.click(None, None, None, cancels=runs)
+    reset_button.click(reset, [sidekick], [message, success_criteria, chatbot, sidekick, thread_id])
 
     
 ui.launch(inbrowser=True)
\ No newline at end of file
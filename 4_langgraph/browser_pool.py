@@ -0,0 +1,123 @@
+import asyncio
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+from langchain_core.runnables.config import ensure_config
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+load_dotenv(override=True)
+
+WARM_CONTEXTS = int(os.getenv("WARM_BROWSER_CONTEXTS", "2"))
+MAX_PAGES_PER_CONTEXT = int(os.getenv("MAX_PAGES_PER_CONTEXT", "5"))
+HEADLESS = os.getenv("BROWSER_HEADLESS", "true").lower() != "false"
+
+
+class SessionBrowser(Browser):
+    """
+    A view of the shared browser that only shows the calling session's context.
+    The Playwright toolkit always drives browser.contexts[0], so this reads the session's context
+    from the run config; the same tools can then serve every session without sharing pages or cookies.
+    """
+
+    def __init__(self, browser: Browser):
+        super().__init__(browser._impl_obj)
+
+    @property
+    def contexts(self) -> List[BrowserContext]:
+        context = ensure_config().get("configurable", {}).get("browser_context")
+        if context is None:
+            raise ValueError("No browser_context in the run config for this session")
+        return [context]
+
+
+class BrowserPool:
+    """
+    One headless Chromium for the whole process, with an isolated BrowserContext for each session.
+    A few contexts are created ahead of time so a new session can start without waiting on the browser,
+    and each context is capped at a number of open pages, closing the oldest first.
+    """
+
+    def __init__(self, warm: int = WARM_CONTEXTS, max_pages: int = MAX_PAGES_PER_CONTEXT, headless: bool = HEADLESS):
+        self.warm = warm
+        self.max_pages = max_pages
+        self.headless = headless
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.idle: List[BrowserContext] = []
+        self.active: set[BrowserContext] = set()
+        self.refill_task = None
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        await self.refill()
+
+    async def new_context(self) -> BrowserContext:
+        context = await self.browser.new_context()
+
+        async def limit_pages(page):
+            while len(context.pages) > self.max_pages:
+                await context.pages[0].close()
+
+        context.on("page", limit_pages)
+        return context
+
+    async def refill(self) -> None:
+        while len(self.idle) < self.warm:
+            self.idle.append(await self.new_context())
+
+    def refill_soon(self) -> None:
+        if not self.refill_task or self.refill_task.done():
+            self.refill_task = asyncio.create_task(self.refill())
+
+    async def acquire(self) -> BrowserContext:
+        context = self.idle.pop() if self.idle else await self.new_context()
+        self.active.add(context)
+        self.refill_soon()
+        return context
+
+    def session_browser(self) -> SessionBrowser:
+        return SessionBrowser(self.browser)
+
+    async def release(self, context: BrowserContext) -> None:
+        """Close a session's context, and with it every page the session opened"""
+        if context in self.active:
+            self.active.discard(context)
+            await context.close()
+
+    def release_soon(self, context: BrowserContext) -> None:
+        """Release from any thread; Gradio runs state delete callbacks outside the event loop"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.loop.create_task(self.release(context))
+        elif self.loop and not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.release(context), self.loop)
+
+    async def close(self) -> None:
+        for context in self.idle + list(self.active):
+            await context.close()
+        self.idle, self.active = [], set()
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+
+
+_browser_pool = None
+_browser_pool_lock = asyncio.Lock()
+
+
+async def get_browser_pool() -> BrowserPool:
+    """The browser pool shared by every Sidekick in this process"""
+    global _browser_pool
+    async with _browser_pool_lock:
+        if _browser_pool is None:
+            pool = BrowserPool()
+            await pool.start()
+            _browser_pool = pool
+    return _browser_pool
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import zlib
+from typing import Any
+import aiosqlite
+from dotenv import load_dotenv
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+load_dotenv(override=True)
+
+SIDEKICK_DB = os.getenv("SIDEKICK_DB", "sidekick.db")
+CHECKPOINTS_TO_KEEP = int(os.getenv("CHECKPOINTS_TO_KEEP", "5"))
+VACUUM_EVERY_SECONDS = int(os.getenv("VACUUM_EVERY_SECONDS", "600"))
+COMPRESSED = "zlib+"
+
+
+class CompressingSerializer:
+    """Wraps the standard serializer and zlib-compresses each serialized checkpoint and write"""
+
+    def __init__(self, level: int = 6):
+        self.inner = JsonPlusSerializer()
+        self.level = level
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        return COMPRESSED + type_, zlib.compress(data, self.level)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(COMPRESSED):
+            return self.inner.loads_typed((type_[len(COMPRESSED) :], zlib.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+
+class PrunedSqliteSaver(AsyncSqliteSaver):
+    """
+    An async SQLite checkpointer that keeps only the most recent checkpoints for each thread.
+    Every checkpoint holds the full state, so older ones are only needed for time travel;
+    dropping them keeps the database and its WAL from growing with the length of a conversation.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, keep: int = CHECKPOINTS_TO_KEEP):
+        super().__init__(conn, serde=CompressingSerializer())
+        self.keep = keep
+        self.vacuum_task = None
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        saved = await super().aput(config, checkpoint, metadata, new_versions)
+        await self.prune(saved["configurable"]["thread_id"], saved["configurable"]["checkpoint_ns"])
+        return saved
+
+    async def prune(self, thread_id: str, checkpoint_ns: str = "") -> None:
+        async with self.lock:
+            async with self.conn.execute(
+                """
+                SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?
+                """,
+                (thread_id, checkpoint_ns, self.keep - 1),
+            ) as cursor:
+                row = await cursor.fetchone()
+            if not row:
+                return
+            for table in ["checkpoints", "writes"]:
+                await self.conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, checkpoint_ns, row[0]),
+                )
+            await self.conn.commit()
+
+    async def delete_thread(self, thread_id: str) -> None:
+        async with self.lock:
+            for table in ["checkpoints", "writes"]:
+                await self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            await self.conn.commit()
+
+    async def vacuum(self) -> None:
+        """Fold the WAL back into the database and release the pages freed by pruning"""
+        async with self.lock:
+            await self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            await self.conn.execute("PRAGMA incremental_vacuum")
+            await self.conn.commit()
+
+    async def vacuum_every(self, seconds: float) -> None:
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await self.vacuum()
+            except Exception as e:
+                print(f"Checkpoint vacuum failed: {e}")
+
+    def start_vacuuming(self, seconds: float = VACUUM_EVERY_SECONDS) -> None:
+        if not self.vacuum_task:
+            self.vacuum_task = asyncio.create_task(self.vacuum_every(seconds))
+
+
+async def create_checkpointer(path: str = SIDEKICK_DB) -> PrunedSqliteSaver:
+    conn = await aiosqlite.connect(path)
+    # auto_vacuum only takes effect on a new database, or after a full VACUUM on an existing one
+    await conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    saver = PrunedSqliteSaver(conn)
+    await saver.setup()
+    saver.start_vacuuming()
+    return saver
+
+
+_checkpointer = None
+_checkpointer_lock = asyncio.Lock()
+
+
+async def get_checkpointer() -> PrunedSqliteSaver:
+    """The checkpointer shared by every Sidekick in this process"""
+    global _checkpointer
+    async with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = await create_checkpointer()
+    return _checkpointer
@@ -0,0 +1,143 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+load_dotenv(override=True)
+
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "12000"))
+MAX_TOOL_OUTPUT_CHARS = int(os.getenv("MAX_TOOL_OUTPUT_CHARS", "2000"))
+KEEP_RECENT_MESSAGES = int(os.getenv("KEEP_RECENT_MESSAGES", "6"))
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_for_model("gpt-4o-mini")
+    except Exception:
+        return None
+
+
+def count_text_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4
+
+
+def count_tokens(messages: List[Any]) -> int:
+    """Approximate prompt tokens for a list of messages, including tool call arguments"""
+    total = 0
+    for message in messages:
+        total += 4 + count_text_tokens(str(message.content))
+        for call in getattr(message, "tool_calls", None) or []:
+            total += count_text_tokens(call["name"] + str(call["args"]))
+    return total
+
+
+def add_counts(left: Optional[Dict[str, int]], right: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Reducer that accumulates per-node counters in the graph state"""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit] + f"\n...[truncated {len(text) - limit} characters]"
+
+
+class ContextManager:
+    """
+    Keeps the prompt for each worker and evaluator call within a token budget.
+    Old tool outputs are cut down, earlier turns are folded into a rolling summary,
+    and only a recent window of messages is sent, so each turn costs about the same however long the task runs.
+    """
+
+    def __init__(
+        self,
+        summarizer=None,
+        max_tokens: int = MAX_CONTEXT_TOKENS,
+        max_tool_chars: int = MAX_TOOL_OUTPUT_CHARS,
+        keep_recent: int = KEEP_RECENT_MESSAGES,
+    ):
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.max_tool_chars = max_tool_chars
+        self.keep_recent = keep_recent
+
+    def shrink_tool_outputs(self, messages: List[Any]) -> List[Any]:
+        """Truncate every tool output except the results of the most recent tool calls"""
+        last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+        shrunk = []
+        for i, message in enumerate(messages):
+            if isinstance(message, ToolMessage) and i < last_ai:
+                content = truncate(str(message.content), self.max_tool_chars)
+                message = message.model_copy(update={"content": content})
+            shrunk.append(message)
+        return shrunk
+
+    def window_start(self, messages: List[Any], budget: int) -> int:
+        """The earliest message that fits the budget, never splitting tool results from their call"""
+        start = len(messages)
+        used = 0
+        while start > 0:
+            cost = count_tokens([messages[start - 1]])
+            if used + cost > budget and len(messages) - start >= self.keep_recent:
+                break
+            used += cost
+            start -= 1
+        while start < len(messages) and isinstance(messages[start], ToolMessage):
+            start += 1
+        return start
+
+    async def summarize(self, summary: Optional[str], messages: List[Any]) -> str:
+        lines = []
+        for message in messages:
+            role = type(message).__name__.replace("Message", "")
+            content = truncate(str(message.content), self.max_tool_chars) or "[Tools use]"
+            lines.append(f"{role}: {content}")
+        prompt = f"""Summarize the earlier part of this conversation between a User and an Assistant working on a task.
+Keep the user's requests, decisions made, facts found, files written and anything still outstanding. Be concise.
+
+Summary so far:
+{summary or "None"}
+
+Messages to add to the summary:
+{chr(10).join(lines)}"""
+        response = await self.summarizer.ainvoke([HumanMessage(content=prompt)])
+        return response.content
+
+    async def prepare(
+        self, messages: List[Any], summary: Optional[str], summarized: int
+    ) -> Tuple[List[Any], Optional[str], int]:
+        """
+        Choose the messages to send for one call.
+
+        Returns:
+            tuple: (window, summary, summarized) where summary covers every message before index summarized
+        """
+        messages = self.shrink_tool_outputs(messages)
+        budget = self.max_tokens - (count_text_tokens(summary) if summary else 0)
+        start = self.window_start(messages, budget)
+        if self.summarizer and start > summarized:
+            summary = await self.summarize(summary, messages[summarized:start])
+            summarized = start
+        start = max(start, summarized) if self.summarizer else start
+        window = messages[start:]
+        # The user's latest request always stays verbatim, even once the turns after it outgrow the budget
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=None)
+        if last_human is not None and last_human < start:
+            window = [messages[last_human]] + window
+        return window, summary, summarized
+
+    @staticmethod
+    def summary_message(summary: Optional[str]) -> List[Any]:
+        if not summary:
+            return []
+        return [SystemMessage(content=f"Summary of the earlier conversation and work:\n{summary}")]
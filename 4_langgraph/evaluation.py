@@ -0,0 +1,146 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+load_dotenv(override=True)
+
+CHEAP_EVALUATOR_MODEL = os.getenv("CHEAP_EVALUATOR_MODEL", "gpt-4.1-nano")
+EVALUATOR_CONFIDENCE = float(os.getenv("EVALUATOR_CONFIDENCE", "0.8"))
+VERDICT_CACHE_SIZE = 1024
+FILE_PATTERN = re.compile(r"(?<![\w\-/.:])[\w\-/]+\.(?:md|txt|csv|json|html|py|pdf|xlsx|yaml|yml|xml)\b", re.IGNORECASE)
+WRITE_PATTERN = re.compile(
+    r"\b(?:write|writes|written|wrote|save|saves|saved|create|creates|created|produce|produces|produced|"
+    r"generate|generates|generated|export|exports|exported|output|outputs|store|stores|stored)\b",
+    re.IGNORECASE,
+)
+WRITE_WINDOW = 60
+
+
+class EvaluatorOutput(BaseModel):
+    feedback: str = Field(description="Feedback on the assistant's response")
+    success_criteria_met: bool = Field(description="Whether the success criteria have been met")
+    user_input_needed: bool = Field(description="True if more input is needed from the user, or clarifications, or the assistant is stuck")
+
+
+class QuickEvaluatorOutput(EvaluatorOutput):
+    confidence: float = Field(description="How confident you are in this verdict, from 0 to 1")
+
+
+def is_question(answer: str) -> bool:
+    lines = [line.strip() for line in answer.strip().splitlines() if line.strip()]
+    return bool(lines) and (lines[0].lower().startswith("question:") or lines[-1].endswith("?"))
+
+
+def required_files(criteria: str) -> list[str]:
+    """
+    The files the criteria ask to be written, e.g. "save the report to report.md" or "report.md is created". Files that are only mentioned,
+    like "based on data.csv", and URLs like docs.python.org/3/index.html are not required.
+    """
+    files = []
+    for match in FILE_PATTERN.finditer(criteria):
+        before = re.split(r"[.;:!?]\s|\n", criteria[max(0, match.start() - WRITE_WINDOW):match.start()])[-1]
+        after = re.split(r"[.;:!?](?:\s|$)|\n", criteria[match.end():match.end() + WRITE_WINDOW])[0]
+        if WRITE_PATTERN.search(before + " " + after):
+            files.append(match.group())
+    return files
+
+
+def missing_files(criteria: str, sandbox_dir: Optional[str]) -> list[str]:
+    if not sandbox_dir:
+        return []
+    return [f for f in required_files(criteria) if not os.path.exists(os.path.join(sandbox_dir, f))]
+
+
+def check_answer(answer: str, criteria: str) -> Optional[EvaluatorOutput]:
+    """Verdicts that need no model: an empty answer, or a question for the user"""
+    if not answer.strip():
+        return EvaluatorOutput(
+            feedback="The reply was empty; please give a final answer or ask a question.",
+            success_criteria_met=False,
+            user_input_needed=False,
+        )
+    if is_question(answer):
+        return EvaluatorOutput(
+            feedback="The Assistant has asked the user a question.",
+            success_criteria_met=False,
+            user_input_needed=True,
+        )
+    return None
+
+
+def quick_messages(request: str, answer: str, criteria: str) -> list:
+    system_message = """You are a fast first-pass evaluator of an Assistant's final answer.
+Decide whether the answer meets the success criteria, and give your confidence in that verdict from 0 to 1.
+Give a low confidence if judging needs the earlier conversation, checking facts or files, or the criteria are demanding."""
+    user_message = f"""The user's request:
+{request}
+
+The success criteria:
+{criteria}
+
+The Assistant's answer:
+{answer}"""
+    return [SystemMessage(content=system_message), HumanMessage(content=user_message)]
+
+
+class EvaluatorCascade:
+    """
+    Evaluates the worker's answers cheapest first: deterministic checks, then a small model, and only
+    when the small model is unsure, the full evaluator with the conversation. Verdicts are cached by a
+    hash of the request, criteria and answer, so a repeated answer is not judged twice.
+    An answer whose criteria ask for a file that is not in the sandbox goes straight to the full evaluator,
+    which can see why from the conversation and ask the user, and its verdict is not cached.
+    """
+
+    def __init__(self, quick_evaluator=None, threshold: float = EVALUATOR_CONFIDENCE, cache_size: int = VERDICT_CACHE_SIZE):
+        self.quick_evaluator = quick_evaluator
+        self.threshold = threshold
+        self.cache: OrderedDict[str, EvaluatorOutput] = OrderedDict()
+        self.cache_size = cache_size
+
+    @staticmethod
+    def answer_hash(request: str, answer: str, criteria: str) -> str:
+        return hashlib.sha256("\x00".join([request, criteria, answer]).encode()).hexdigest()
+
+    def remember(self, key: str, verdict: EvaluatorOutput) -> None:
+        self.cache[key] = verdict
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def evaluate(
+        self,
+        request: str,
+        answer: str,
+        criteria: str,
+        sandbox_dir: Optional[str],
+        full_evaluation: Callable[[], Awaitable[EvaluatorOutput]],
+    ) -> Tuple[EvaluatorOutput, str]:
+        """
+        Returns:
+            tuple: (verdict, stage) where stage is deterministic, cache, quick, escalated (quick then full) or full
+        """
+        verdict = check_answer(answer, criteria)
+        if verdict:
+            return verdict, "deterministic"
+        if missing_files(criteria, sandbox_dir):
+            return await full_evaluation(), "full"
+        key = self.answer_hash(request, answer, criteria)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key], "cache"
+        stage = "full"
+        if self.quick_evaluator:
+            quick = await self.quick_evaluator.ainvoke(quick_messages(request, answer, criteria))
+            if quick.confidence >= self.threshold:
+                verdict, stage = EvaluatorOutput(**quick.model_dump(exclude={"confidence"})), "quick"
+            else:
+                stage = "escalated"
+        if not verdict:
+            verdict = await full_evaluation()
+        self.remember(key, verdict)
+        return verdict, stage
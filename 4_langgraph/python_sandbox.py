@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import sys
+from typing import List, Optional
+from dotenv import load_dotenv
+from langchain_core.runnables.config import ensure_config
+from langchain_core.tools import StructuredTool
+
+load_dotenv(override=True)
+
+PYTHON_WORKERS = int(os.getenv("PYTHON_WORKERS", "4"))
+PYTHON_TIMEOUT_SECONDS = float(os.getenv("PYTHON_TIMEOUT_SECONDS", "30"))
+PYTHON_CPU_SECONDS = int(os.getenv("PYTHON_CPU_SECONDS", "20"))
+PYTHON_MEMORY_MB = int(os.getenv("PYTHON_MEMORY_MB", "1024"))
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+RESULT_LINE_LIMIT = 1024 * 1024
+
+_sandboxes = []
+
+
+class SandboxWorker:
+    """One worker process; it is killed and started again if a job overruns or the process dies"""
+
+    def __init__(self, index: int, root: str, cpu_seconds: int, memory_mb: int):
+        self.workdir = os.path.abspath(os.path.join(root, f".python_worker_{index}"))
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            WORKER_SCRIPT,
+            str(self.cpu_seconds),
+            str(self.memory_mb),
+            self.workdir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=RESULT_LINE_LIMIT,
+        )
+
+    def kill(self) -> None:
+        if self.alive():
+            self.process.kill()
+        self.process = None
+
+    async def run(self, code: str, cwd: str, timeout: float) -> dict:
+        self.process.stdin.write((json.dumps({"code": code, "cwd": cwd}) + "\n").encode())
+        await self.process.stdin.drain()
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise ConnectionResetError("worker exited")
+        return json.loads(line)
+
+
+class PythonSandbox:
+    """
+    Runs agent-written Python on a pool of pre-started worker processes, so a heavy computation never
+    blocks the event loop and several sessions can run code at once.
+    Each job runs in the session's sandbox directory, with a wall-clock timeout, a CPU time limit and a
+    memory limit; a worker that overruns or is cancelled is killed and replaced.
+    """
+
+    def __init__(
+        self,
+        workers: int = PYTHON_WORKERS,
+        timeout: float = PYTHON_TIMEOUT_SECONDS,
+        cpu_seconds: int = PYTHON_CPU_SECONDS,
+        memory_mb: int = PYTHON_MEMORY_MB,
+        root: str = "sandbox",
+    ):
+        self.timeout = timeout
+        self.workers: List[SandboxWorker] = [SandboxWorker(i, root, cpu_seconds, memory_mb) for i in range(workers)]
+        self.idle: Optional[asyncio.Queue] = None
+
+    async def start(self) -> None:
+        self.idle = asyncio.Queue()
+        await asyncio.gather(*[worker.start() for worker in self.workers])
+        for worker in self.workers:
+            self.idle.put_nowait(worker)
+        _sandboxes.append(self)
+
+    async def run(self, code: str, cwd: Optional[str] = None) -> str:
+        worker = await self.idle.get()
+        try:
+            if not worker.alive():
+                await worker.start()
+            result = await worker.run(code, os.path.abspath(cwd or worker.workdir), self.timeout)
+        except asyncio.TimeoutError:
+            worker.kill()
+            return f"Error: the code ran for more than {self.timeout:.0f} seconds and was stopped"
+        except (ConnectionResetError, BrokenPipeError):
+            worker.kill()
+            return "Error: the Python process was stopped, most likely for exceeding its CPU time or memory limit"
+        except asyncio.CancelledError:
+            worker.kill()
+            raise
+        finally:
+            self.idle.put_nowait(worker)
+        output = result["stdout"]
+        if result["stderr"]:
+            output += f"\nstderr:\n{result['stderr']}"
+        return output
+
+    async def close(self) -> None:
+        for worker in self.workers:
+            process = worker.process
+            worker.kill()
+            if process:
+                await process.wait()
+
+
+async def close_sandboxes() -> None:
+    """Stop the workers of every sandbox started in this process"""
+    while _sandboxes:
+        await _sandboxes.pop().close()
+
+
+def python_tool(sandbox: PythonSandbox) -> StructuredTool:
+    async def run_python(code: str) -> str:
+        sandbox_dir = ensure_config().get("configurable", {}).get("sandbox_dir")
+        return await sandbox.run(code, sandbox_dir)
+
+    return StructuredTool.from_function(
+        coroutine=run_python,
+        name="Python_REPL",
+        description=(
+            "A Python shell. Use this to execute python commands. Input should be a valid python command. "
+            "If you want to see the output of a value, you should print it out with `print(...)`. "
+            "Code runs in your sandbox directory, in a fresh namespace each time, "
+            f"and is stopped after {sandbox.timeout:.0f} seconds."
+        ),
+    )
@@ -0,0 +1,81 @@
+"""
+A long-lived Python worker for the Sidekick's python tool, started by python_sandbox.PythonSandbox.
+It reads one JSON job per line from stdin, runs the code with CPU and memory limits, and writes
+the captured stdout and stderr back as one JSON line.
+
+This file only uses the standard library so that workers start quickly.
+"""
+
+import io
+import json
+import os
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+try:
+    import resource
+except ImportError:  # Windows has no resource limits; the tool's timeout still applies
+    resource = None
+
+MAX_OUTPUT_CHARS = 10000
+
+
+def limit_memory(memory_mb: int) -> None:
+    if resource and memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+
+def limit_cpu(cpu_seconds: int) -> None:
+    """The CPU limit counts the whole process, so move it on by cpu_seconds from what has been used so far"""
+    if resource and cpu_seconds > 0:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def clip(text: str) -> str:
+    if len(text) <= MAX_OUTPUT_CHARS:
+        return text
+    return text[:MAX_OUTPUT_CHARS] + f"\n...[truncated {len(text) - MAX_OUTPUT_CHARS} characters]"
+
+
+def run(code: str, cwd: str) -> dict:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    os.makedirs(cwd, exist_ok=True)
+    os.chdir(cwd)
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<sidekick>", "exec"), {"__name__": "__main__"})
+        except BaseException as e:
+            # Drop this file's frame so the traceback starts at the agent's code
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    return {"stdout": clip(stdout.getvalue()), "stderr": clip(stderr.getvalue())}
+
+
+def serve(cpu_seconds: int, memory_mb: int, workdir: str) -> None:
+    # Keep the job pipes to ourselves, so code that reads stdin or writes to the raw file descriptors can't corrupt them
+    jobs = os.fdopen(os.dup(0), "r")
+    results = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.makedirs(workdir, exist_ok=True)
+    limit_memory(memory_mb)
+    for line in jobs:
+        job = json.loads(line)
+        limit_cpu(cpu_seconds)
+        result = run(job["code"], job.get("cwd") or workdir)
+        results.write(json.dumps(result) + "\n")
+        results.flush()
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]), int(sys.argv[2]), sys.argv[3])
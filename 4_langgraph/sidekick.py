@@ -5,53 +5,55 @@ from langgraph.graph.message import add_messages
 from dotenv import load_dotenv
 from langgraph.prebuilt import ToolNode
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from typing import List, Any, Optional, Dict
-from pydantic import BaseModel, Field
-from sidekick_tools import playwright_tools, other_tools
-import uuid
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from typing import List, Any, Optional, Dict, Tuple
+from sidekick_tools import playwright_tools, other_tools, SANDBOX_DIR
+from checkpointer import get_checkpointer
+from browser_pool import get_browser_pool
+from context import ContextManager, add_counts, count_tokens, truncate
+from evaluation import EvaluatorCascade, EvaluatorOutput, QuickEvaluatorOutput, CHEAP_EVALUATOR_MODEL
 import asyncio
+import os
+import uuid
 from datetime import datetime
 
 load_dotenv(override=True)
 
+WORKER_TAG = "sidekick_worker"
+TOOL_NOTICE_CHARS = 300
+
 class State(TypedDict):
     messages: Annotated[List[Any], add_messages]
     success_criteria: str
     feedback_on_work: Optional[str]
     success_criteria_met: bool
     user_input_needed: bool
+    summary: Optional[str]
+    summarized_count: int
+    token_counts: Annotated[Dict[str, int], add_counts]
 
 
-class EvaluatorOutput(BaseModel):
-    feedback: str = Field(description="Feedback on the assistant's response")
-    success_criteria_met: bool = Field(description="Whether the success criteria have been met")
-    user_input_needed: bool = Field(description="True if more input is needed from the user, or clarifications, or the assistant is stuck")
+class SidekickGraph:
+    """
+    The compiled graph with its tools and model clients. These are the same for every session,
+    so they are built once per process; each session only brings its thread id, browser context
+    and sandbox directory, passed in through the run config.
+    """
 
+    def __init__(
+        self, memory, tools, worker_llm_with_tools, evaluator_llm_with_output, context, evaluation=None, browser_pool=None
+    ):
+        self.memory = memory
+        self.tools = tools
+        self.worker_llm_with_tools = worker_llm_with_tools
+        self.evaluator_llm_with_output = evaluator_llm_with_output
+        self.context = context
+        self.evaluation = evaluation or EvaluatorCascade()
+        self.browser_pool = browser_pool
+        self.graph = self.build_graph()
 
-class Sidekick:
-    def __init__(self):
-        self.worker_llm_with_tools = None
-        self.evaluator_llm_with_output = None
-        self.tools = None
-        self.llm_with_tools = None
-        self.graph = None
-        self.sidekick_id = str(uuid.uuid4())
-        self.memory = MemorySaver()
-        self.browser = None
-        self.playwright = None
-
-    async def setup(self):
-        self.tools, self.browser, self.playwright = await playwright_tools()
-        self.tools += await other_tools()
-        worker_llm = ChatOpenAI(model="gpt-4o-mini")
-        self.worker_llm_with_tools = worker_llm.bind_tools(self.tools)
-        evaluator_llm = ChatOpenAI(model="gpt-4o-mini")
-        self.evaluator_llm_with_output = evaluator_llm.with_structured_output(EvaluatorOutput)
-        await self.build_graph()
-
-    def worker(self, state: State) -> Dict[str, Any]:
+    async def worker(self, state: State) -> Dict[str, Any]:
         system_message = f"""You are a helpful assistant that can use tools to complete tasks.
     You keep working on a task until either you have a question or clarification for the user, or the success criteria is met.
     You have many tools to help you, including tools to browse the internet, navigating and retrieving web pages.
@@ -75,24 +77,22 @@ class Sidekick:
     {state['feedback_on_work']}
     With this feedback, please continue the assignment, ensuring that you meet the success criteria or have a question for the user."""
         
-        # Add in the system message
+        # Keep only a recent window of the conversation, with earlier turns folded into a summary
 
-        found_system_message = False
-        messages = state["messages"]
-        for message in messages:
-            if isinstance(message, SystemMessage):
-                message.content = system_message
-                found_system_message = True
-        
-        if not found_system_message:
-            messages = [SystemMessage(content=system_message)] + messages
+        window, summary, summarized = await self.context.prepare(
+            state["messages"], state.get("summary"), state.get("summarized_count", 0)
+        )
+        messages = [SystemMessage(content=system_message)] + self.context.summary_message(summary) + window
         
         # Invoke the LLM with tools
-        response = self.worker_llm_with_tools.invoke(messages)
+        response = await self.worker_llm_with_tools.ainvoke(messages)
         
         # Return updated state
         return {
             "messages": [response],
+            "summary": summary,
+            "summarized_count": summarized,
+            "token_counts": {"worker_calls": 1, "worker_tokens": count_tokens(messages)},
         }
 
 
@@ -114,8 +114,39 @@ class Sidekick:
                 conversation += f"Assistant: {text}\n"
         return conversation
         
-    def evaluator(self, state: State) -> State:
+    async def evaluator(self, state: State, config: RunnableConfig) -> State:
+        last_response = state["messages"][-1].content
+        request = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
+        sandbox_dir = config.get("configurable", {}).get("sandbox_dir")
+        updates = {}
+
+        async def full_evaluation() -> EvaluatorOutput:
+            eval_result, full_updates = await self.full_evaluation(state)
+            updates.update(full_updates)
+            return eval_result
+
+        eval_result, stage = await self.evaluation.evaluate(
+            request, last_response, state["success_criteria"], sandbox_dir, full_evaluation
+        )
+        counts = add_counts(updates.pop("token_counts", {}), {"evaluations": 1, f"evaluator_{stage}": 1})
+        return {
+            "messages": [{"role": "assistant", "content": f"Evaluator Feedback on this answer: {eval_result.feedback}"}],
+            "feedback_on_work": eval_result.feedback,
+            "success_criteria_met": eval_result.success_criteria_met,
+            "user_input_needed": eval_result.user_input_needed,
+            **updates,
+            "token_counts": counts,
+        }
+
+    async def full_evaluation(self, state: State) -> Tuple[EvaluatorOutput, Dict[str, Any]]:
+        """The full evaluator, which sees the conversation; the cascade only reaches it when the cheaper checks are unsure"""
         last_response = state["messages"][-1].content
+        window, summary, summarized = await self.context.prepare(
+            state["messages"], state.get("summary"), state.get("summarized_count", 0)
+        )
+        conversation = self.format_conversation(window)
+        if summary:
+            conversation = f"Summary of the earlier conversation:\n{summary}\n\n{conversation}"
 
         system_message = f"""You are an evaluator that determines if a task has been completed successfully by an Assistant.
     Assess the Assistant's last response based on the given criteria. Respond with your feedback, and with your decision on whether the success criteria has been met,
@@ -123,8 +154,8 @@ class Sidekick:
         
         user_message = f"""You are evaluating a conversation between the User and Assistant. You decide what action to take based on the last response from the Assistant.
 
-    The entire conversation with the assistant, with the user's original request and all replies, is:
-    {self.format_conversation(state['messages'])}
+    The conversation with the assistant, with the user's request and the recent replies, is:
+    {conversation}
 
     The success criteria for this assignment is:
     {state['success_criteria']}
@@ -145,14 +176,12 @@ class Sidekick:
         
         evaluator_messages = [SystemMessage(content=system_message), HumanMessage(content=user_message)]
 
-        eval_result = self.evaluator_llm_with_output.invoke(evaluator_messages)
-        new_state = {
-            "messages": [{"role": "assistant", "content": f"Evaluator Feedback on this answer: {eval_result.feedback}"}],
-            "feedback_on_work": eval_result.feedback,
-            "success_criteria_met": eval_result.success_criteria_met,
-            "user_input_needed": eval_result.user_input_needed
+        eval_result = await self.evaluator_llm_with_output.ainvoke(evaluator_messages)
+        return eval_result, {
+            "summary": summary,
+            "summarized_count": summarized,
+            "token_counts": {"evaluator_calls": 1, "evaluator_tokens": count_tokens(evaluator_messages)},
         }
-        return new_state
 
     def route_based_on_evaluation(self, state: State) -> str:
         if state["success_criteria_met"] or state["user_input_needed"]:
@@ -161,7 +190,7 @@ class Sidekick:
             return "worker"
 
 
-    async def build_graph(self):
+    def build_graph(self):
         # Set up Graph Builder with State
         graph_builder = StateGraph(State)
 
@@ -177,33 +206,155 @@ class Sidekick:
         graph_builder.add_edge(START, "worker")
 
         # Compile the graph
-        self.graph = graph_builder.compile(checkpointer=self.memory)
+        return graph_builder.compile(checkpointer=self.memory)
 
-    async def run_superstep(self, message, success_criteria, history):
-        config = {"configurable": {"thread_id": self.sidekick_id}}
 
-        state = {
+async def create_sidekick_graph(with_browser: bool = True) -> SidekickGraph:
+    memory = await get_checkpointer()
+    browser_pool = await get_browser_pool() if with_browser else None
+    tools = playwright_tools(browser_pool.session_browser()) if browser_pool else []
+    tools += await other_tools()
+    worker_llm = ChatOpenAI(model="gpt-4o-mini")
+    evaluator_llm = ChatOpenAI(model="gpt-4o-mini")
+    return SidekickGraph(
+        memory=memory,
+        tools=tools,
+        worker_llm_with_tools=worker_llm.bind_tools(tools).with_config(tags=[WORKER_TAG]),
+        evaluator_llm_with_output=evaluator_llm.with_structured_output(EvaluatorOutput),
+        context=ContextManager(summarizer=ChatOpenAI(model="gpt-4o-mini")),
+        evaluation=EvaluatorCascade(
+            quick_evaluator=ChatOpenAI(model=CHEAP_EVALUATOR_MODEL).with_structured_output(QuickEvaluatorOutput)
+        ),
+        browser_pool=browser_pool,
+    )
+
+
+_sidekick_graph = None
+_sidekick_graph_lock = asyncio.Lock()
+
+
+async def get_sidekick_graph() -> SidekickGraph:
+    """The graph shared by every Sidekick in this process"""
+    global _sidekick_graph
+    async with _sidekick_graph_lock:
+        if _sidekick_graph is None:
+            _sidekick_graph = await create_sidekick_graph()
+    return _sidekick_graph
+
+
+class Sidekick:
+    def __init__(self, sidekick_id: Optional[str] = None, sandbox_root: str = SANDBOX_DIR):
+        self.sidekick_id = sidekick_id or str(uuid.uuid4())
+        self.sidekick_graph = None
+        self.graph = None
+        self.browser_context = None
+        self.sandbox_dir = os.path.join(sandbox_root, self.sidekick_id)
+
+    async def setup(self, sidekick_graph: Optional[SidekickGraph] = None):
+        self.sidekick_graph = sidekick_graph or await get_sidekick_graph()
+        self.graph = self.sidekick_graph.graph
+        if self.sidekick_graph.browser_pool:
+            self.browser_context = await self.sidekick_graph.browser_pool.acquire()
+        os.makedirs(self.sandbox_dir, exist_ok=True)
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "configurable": {
+                "thread_id": self.sidekick_id,
+                "browser_context": self.browser_context,
+                "sandbox_dir": self.sandbox_dir,
+            }
+        }
+
+    def initial_state(self, message, success_criteria) -> Dict[str, Any]:
+        return {
             "messages": message,
             "success_criteria": success_criteria or "The answer should be clear and accurate",
             "feedback_on_work": None,
             "success_criteria_met": False,
             "user_input_needed": False
         }
-        result = await self.graph.ainvoke(state, config=config)
+
+    async def run_superstep(self, message, success_criteria, history):
+        config = self.config()
+        result = await self.graph.ainvoke(self.initial_state(message, success_criteria), config=config)
         user = {"role": "user", "content": message}
         reply = {"role": "assistant", "content": result["messages"][-2].content}
         feedback = {"role": "assistant", "content": result["messages"][-1].content}
         return history + [user, reply, feedback]
+
+    async def stream_superstep(self, message, success_criteria, history):
+        """
+        Run one superstep, yielding the chat as it changes: the worker's tokens as they arrive, a notice for
+        each tool call, and the evaluator's verdict. If the caller stops listening, the run is cancelled with it.
+        """
+        config = self.config()
+        history = history + [{"role": "user", "content": message}]
+        yield history
+        reply = None
+        tool_notices = {}
+        try:
+            async for event in self.graph.astream_events(
+                self.initial_state(message, success_criteria), config=config, version="v2"
+            ):
+                kind = event["event"]
+                from_worker = WORKER_TAG in event.get("tags", [])
+                if kind == "on_chat_model_start" and from_worker:
+                    reply = {"role": "assistant", "content": ""}
+                    history.append(reply)
+                elif kind == "on_chat_model_stream" and from_worker and event["data"]["chunk"].content:
+                    reply["content"] += event["data"]["chunk"].content
+                    yield history
+                elif kind == "on_chat_model_end" and from_worker and not reply["content"]:
+                    history.remove(reply)
+                elif kind == "on_tool_start":
+                    notice = {
+                        "role": "assistant",
+                        "content": truncate(str(event["data"].get("input", "")), TOOL_NOTICE_CHARS),
+                        "metadata": {"title": f"Using {event['name']}", "status": "pending"},
+                    }
+                    tool_notices[event["run_id"]] = notice
+                    history.append(notice)
+                    yield history
+                elif kind == "on_tool_end" and event["run_id"] in tool_notices:
+                    tool_notices.pop(event["run_id"])["metadata"]["status"] = "done"
+                    yield history
+                elif kind == "on_chain_end" and event["name"] == "evaluator":
+                    feedback = event["data"]["output"]["feedback_on_work"]
+                    history.append({"role": "assistant", "content": f"Evaluator Feedback on this answer: {feedback}"})
+                    yield history
+        except (asyncio.CancelledError, GeneratorExit):
+            await asyncio.shield(self.close_pending_tool_calls(config))
+            raise
+
+    async def close_pending_tool_calls(self, config) -> None:
+        """After a cancelled run, answer any tool calls left open so the next request is a valid conversation"""
+        snapshot = await self.graph.aget_state(config)
+        messages = snapshot.values.get("messages", [])
+        if messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+            cancelled = [
+                ToolMessage(content="Cancelled by the user", tool_call_id=call["id"]) for call in messages[-1].tool_calls
+            ]
+            await self.graph.aupdate_state(config, {"messages": cancelled}, as_node="tools")
+
+    async def get_history(self) -> List[Dict[str, str]]:
+        """Rebuild the chat for this thread from its latest checkpoint, so a conversation survives a restart"""
+        snapshot = await self.graph.aget_state(self.config())
+        history = []
+        for message in snapshot.values.get("messages", []):
+            if isinstance(message, HumanMessage):
+                history.append({"role": "user", "content": message.content})
+            elif isinstance(message, AIMessage) and message.content and not message.tool_calls:
+                history.append({"role": "assistant", "content": message.content})
+        return history
+
+    async def forget(self):
+        """Delete this thread's checkpoints"""
+        if self.sidekick_graph:
+            await self.sidekick_graph.memory.delete_thread(self.sidekick_id)
     
     def cleanup(self):
-        if self.browser:
-            try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(self.browser.close())
-                if self.playwright:
-                    loop.create_task(self.playwright.stop())
-            except RuntimeError:
-                # If no loop is running, do a direct run
-                asyncio.run(self.browser.close())
-                if self.playwright:
-                    asyncio.run(self.playwright.stop())
+        """Hand this session's browser context back to the pool, closing its pages"""
+        if self.browser_context:
+            self.sidekick_graph.browser_pool.release_soon(self.browser_context)
+            self.browser_context = None
@@ -0,0 +1,190 @@
+"""
+Load test for the Sidekick graph against a local stub chat model, so no API calls are made.
+Runs N sessions at once and compares the wall-clock time with a single session.
+With async nodes, N sessions should take about as long as one; with blocking nodes they take N times as long.
+It also replays a long tool-using task to show the prompt size per turn with and without context management,
+times building the shared graph at app start against setting up one more session on it,
+and counts evaluator calls and latency for a mix of tasks with and without the evaluator cascade.
+
+N concurrent sessions taking more than CONCURRENCY_FACTOR times as long as one fails the run, so a blocking call
+creeping back into a node is caught; `uv run sidekick_benchmark.py check` runs only that check.
+
+Run with: uv run sidekick_benchmark.py
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from sidekick import Sidekick, SidekickGraph, EvaluatorOutput, create_sidekick_graph
+from context import ContextManager, count_tokens
+from evaluation import EvaluatorCascade, QuickEvaluatorOutput
+from python_sandbox import close_sandboxes
+
+LATENCY = 0.5
+SESSIONS = [1, 5, 10, 20]
+SETUP_SESSIONS = 20
+CONCURRENCY_FACTOR = 2.0
+SANDBOX_ROOT = tempfile.mkdtemp(prefix="sidekick_benchmark_")
+TOOL_TURNS = [1, 10, 25, 50]
+TOOL_OUTPUT = "Search result with a long page of text. " * 400
+QUICK_LATENCY = 0.1
+EVALUATION_TASKS = {
+    "What is 2 + 2?": "2 + 2 = 4",
+    "What is the capital of France?": "The capital of France is Paris.",
+    "Book me a table for dinner": "Question: which city, and for what time?",
+    "Compare three vector databases for our workload": "Detailed analysis of three vector databases...",
+}
+EVALUATION_RUNS = ["What is 2 + 2?"] * 3 + list(EVALUATION_TASKS) * 2
+
+
+class StubChatModel:
+    """Stands in for a chat model: waits for a fixed latency, then answers with a fresh response to the messages"""
+
+    def __init__(self, respond, latency: float = LATENCY, blocking: bool = False):
+        self.respond = respond
+        self.latency = latency
+        self.blocking = blocking
+        self.calls = 0
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        return self.respond(messages)
+
+
+class FullEvaluationOnly:
+    """The evaluator before the cascade: every answer gets the full evaluator"""
+
+    async def evaluate(self, request, answer, criteria, sandbox_dir, full_evaluation):
+        return await full_evaluation(), "full"
+
+
+def make_stub_graph(blocking: bool = False, worker=None, evaluation=None) -> SidekickGraph:
+    return SidekickGraph(
+        memory=MemorySaver(),
+        tools=[],
+        worker_llm_with_tools=worker or StubChatModel(lambda m: AIMessage(content="The answer is 42"), blocking=blocking),
+        evaluator_llm_with_output=StubChatModel(
+            lambda m: EvaluatorOutput(feedback="Looks good", success_criteria_met=True, user_input_needed=False),
+            blocking=blocking,
+        ),
+        context=ContextManager(),
+        evaluation=evaluation,
+    )
+
+
+async def make_sidekick(sidekick_graph: SidekickGraph) -> Sidekick:
+    sidekick = Sidekick(sandbox_root=SANDBOX_ROOT)
+    await sidekick.setup(sidekick_graph)
+    return sidekick
+
+
+async def run_sessions(count: int, blocking: bool = False) -> float:
+    sidekick_graph = make_stub_graph(blocking, evaluation=FullEvaluationOnly())
+    sidekicks = [await make_sidekick(sidekick_graph) for _ in range(count)]
+    start = time.perf_counter()
+    await asyncio.gather(*[s.run_superstep("What is the answer?", "", []) for s in sidekicks])
+    return time.perf_counter() - start
+
+
+async def check_concurrency(sessions: int = max(SESSIONS), factor: float = CONCURRENCY_FACTOR, blocking: bool = False) -> None:
+    """Fail unless N concurrent sessions finish in under `factor` times the time of one session"""
+    one = await run_sessions(1, blocking)
+    many = await run_sessions(sessions, blocking)
+    assert many < factor * one, (
+        f"{sessions} concurrent sessions took {many:.2f}s, more than {factor}x the {one:.2f}s of one session; "
+        "a node is probably blocking the event loop"
+    )
+    print(f"Concurrency check passed: {sessions} sessions in {many:.2f}s, one session in {one:.2f}s")
+
+
+async def prompt_tokens_per_turn(manage: bool) -> dict:
+    summarizer = StubChatModel(lambda m: AIMessage(content="Searched the web several times for the answer."), latency=0)
+    context = ContextManager(summarizer=summarizer) if manage else None
+    messages = [HumanMessage(content="Research the answer and write it to a file")]
+    summary, summarized = None, 0
+    tokens = {}
+    for turn in range(1, max(TOOL_TURNS) + 1):
+        call = {"name": "search", "args": {"query": f"query {turn}"}, "id": f"call_{turn}"}
+        messages.append(AIMessage(content="", tool_calls=[call]))
+        messages.append(ToolMessage(content=TOOL_OUTPUT, tool_call_id=call["id"]))
+        window = messages
+        if context:
+            window, summary, summarized = await context.prepare(messages, summary, summarized)
+            window = context.summary_message(summary) + window
+        if turn in TOOL_TURNS:
+            tokens[turn] = count_tokens(window)
+    return tokens
+
+
+def quick_verdict(messages) -> QuickEvaluatorOutput:
+    """The stub small model is sure about short factual answers, and unsure about long analyses"""
+    unsure = "analysis" in messages[-1].content.lower()
+    return QuickEvaluatorOutput(
+        feedback="Answers the question", success_criteria_met=True, user_input_needed=False, confidence=0.5 if unsure else 0.95
+    )
+
+
+async def evaluation_costs(cascade: bool) -> tuple[int, int, float]:
+    worker = StubChatModel(lambda m: AIMessage(content=EVALUATION_TASKS[m[-1].content]))
+    quick = StubChatModel(quick_verdict, latency=QUICK_LATENCY)
+    evaluation = EvaluatorCascade(quick_evaluator=quick) if cascade else FullEvaluationOnly()
+    sidekick_graph = make_stub_graph(worker=worker, evaluation=evaluation)
+    start = time.perf_counter()
+    for request in EVALUATION_RUNS:
+        sidekick = await make_sidekick(sidekick_graph)
+        await sidekick.run_superstep(request, "", [])
+    elapsed = time.perf_counter() - start
+    return sidekick_graph.evaluator_llm_with_output.calls, quick.calls, elapsed
+
+
+async def setup_times() -> tuple[float, float]:
+    """Build the real graph, tools and model clients once (no model calls are made), then time new sessions on it"""
+    start = time.perf_counter()
+    sidekick_graph = await create_sidekick_graph(with_browser=False)
+    cold_start = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(SETUP_SESSIONS):
+        await make_sidekick(sidekick_graph)
+    per_session = (time.perf_counter() - start) / SETUP_SESSIONS
+    await sidekick_graph.memory.conn.close()
+    await close_sandboxes()
+    return cold_start, per_session
+
+
+async def main():
+    await check_concurrency()
+    if sys.argv[1:] == ["check"]:
+        return
+    print(f"Stub model latency {LATENCY}s; each session makes one worker and one evaluator call")
+    for blocking in [False, True]:
+        label = "blocking invoke" if blocking else "async ainvoke"
+        for count in SESSIONS:
+            elapsed = await run_sessions(count, blocking)
+            print(f"{label:>16}: {count:>3} concurrent sessions in {elapsed:.2f}s")
+    cold_start, per_session = await setup_times()
+    print(f"Cold start building the shared graph: {cold_start * 1000:.1f}ms (previously paid by every session and reset)")
+    print(f"Setup for each further session: {per_session * 1000:.2f}ms")
+    print("Worker prompt tokens by tool-call turn")
+    for manage in [False, True]:
+        label = "managed context" if manage else "full history"
+        tokens = await prompt_tokens_per_turn(manage)
+        print(f"{label:>16}: " + "  ".join(f"turn {turn}: {count:,}" for turn, count in tokens.items()))
+    print(f"Evaluation of {len(EVALUATION_RUNS)} tasks (full evaluator {LATENCY}s, small model {QUICK_LATENCY}s)")
+    for cascade in [False, True]:
+        label = "cascade" if cascade else "full evaluator"
+        full_calls, quick_calls, elapsed = await evaluation_costs(cascade)
+        print(
+            f"{label:>16}: {full_calls} full evaluator calls, {quick_calls} small model calls, "
+            f"{elapsed / len(EVALUATION_RUNS):.2f}s per task"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,17 @@
-from playwright.async_api import async_playwright
 from langchain_community.agent_toolkits import PlayWrightBrowserToolkit
 from dotenv import load_dotenv
 import os
 import requests
+from pathlib import Path
+from langchain_core.runnables.config import ensure_config
 from langchain.agents import Tool
 from langchain_community.agent_toolkits import FileManagementToolkit
 from langchain_community.tools.wikipedia.tool import WikipediaQueryRun
-from langchain_experimental.tools import PythonREPLTool
 from langchain_community.utilities import GoogleSerperAPIWrapper
 from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
+from langchain_community.tools.file_management.utils import get_validated_relative_path
+from python_sandbox import PythonSandbox, python_tool
+from tool_cache import ToolCache, cached_tool, SEARCH_CACHE_TTL, WIKIPEDIA_CACHE_TTL
 
 
 
@@ -17,39 +20,62 @@ pushover_token = os.getenv("PUSHOVER_TOKEN")
 pushover_user = os.getenv("PUSHOVER_USER")
 pushover_url = "https://api.pushover.net/1/messages.json"
 serper = GoogleSerperAPIWrapper()
+SANDBOX_DIR = "sandbox"
 
-async def playwright_tools():
-    playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=False)
+def playwright_tools(browser):
     toolkit = PlayWrightBrowserToolkit.from_browser(async_browser=browser)
-    return toolkit.get_tools(), browser, playwright
+    return toolkit.get_tools()
 
 
 def push(text: str):
     """Send a push notification to the user"""
-    requests.post(pushover_url, data = {"token": pushover_token, "user": pushover_user, "message": text})
+    requests.post(pushover_url, data = {"token": pushover_token, "user": pushover_user, "message": text}, timeout=10)
     return "success"
 
 
+def session_file_tool(tool):
+    """Rebuild a file tool so it works in the sandbox_dir given in the run config, falling back to the shared sandbox"""
+
+    class SessionFileTool(type(tool)):
+        def get_relative_path(self, file_path: str) -> Path:
+            root = ensure_config().get("configurable", {}).get("sandbox_dir", self.root_dir)
+            return get_validated_relative_path(Path(root), file_path)
+
+    return SessionFileTool(root_dir=tool.root_dir)
+
+
 def get_file_tools():
-    toolkit = FileManagementToolkit(root_dir="sandbox")
-    return toolkit.get_tools()
+    toolkit = FileManagementToolkit(root_dir=SANDBOX_DIR)
+    return [session_file_tool(tool) for tool in toolkit.get_tools()]
 
 
 async def other_tools():
     push_tool = Tool(name="send_push_notification", func=push, description="Use this tool when you want to send a push notification")
     file_tools = get_file_tools()
 
-    tool_search =Tool(
+    cache = ToolCache()
+
+    tool_search = cached_tool(
+        cache,
         name="search",
+        description="Use this tool when you want to get the results of an online web search",
+        ttl=SEARCH_CACHE_TTL,
         func=serper.run,
-        description="Use this tool when you want to get the results of an online web search"
+        coroutine=serper.arun,
     )
 
     wikipedia = WikipediaAPIWrapper()
-    wiki_tool = WikipediaQueryRun(api_wrapper=wikipedia)
+    wiki_tool = cached_tool(
+        cache,
+        name="wikipedia",
+        description=WikipediaQueryRun(api_wrapper=wikipedia).description,
+        ttl=WIKIPEDIA_CACHE_TTL,
+        func=wikipedia.run,
+    )
 
-    python_repl = PythonREPLTool()
+    python_sandbox = PythonSandbox(root=SANDBOX_DIR)
+    await python_sandbox.start()
+    python_repl = python_tool(python_sandbox)
     
     return file_tools + [push_tool, tool_search, python_repl,  wiki_tool]
 
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+from dotenv import load_dotenv
+from langchain_core.tools import StructuredTool
+
+load_dotenv(override=True)
+
+TOOL_CACHE_DB = os.getenv("TOOL_CACHE_DB", "tool_cache.db")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+WIKIPEDIA_CACHE_TTL = int(os.getenv("WIKIPEDIA_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+MEMORY_ENTRIES = 512
+
+
+def normalize_query(query: str) -> str:
+    """
+    Map trivial rephrasings of the same search onto one key: case, punctuation and spacing are ignored, so
+    "Who is the CEO of OpenAI?" and "who is the  CEO of openai" share an entry. Word order and every word are kept,
+    since "flights from Paris to London" and "flights from London to Paris" are different searches.
+    """
+    return " ".join(re.findall(r"\w+", query.casefold()))
+
+
+class SharedLookup:
+    """A lookup in flight, and how many callers are still waiting for it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class ToolCache:
+    """
+    Caches tool results by tool name and normalized query, each with its own TTL.
+    Entries live in SQLite so they survive restarts and are shared by every session; recent entries are also
+    held in memory, so a hit on the event loop is answered without touching the database.
+    Identical lookups that arrive while one is already in flight wait for it instead of calling the tool again.
+    A caller that is cancelled, e.g. because its user pressed Stop, stops waiting without failing the others;
+    the lookup itself is cancelled only once nobody is waiting for it.
+    """
+
+    def __init__(self, path: str = TOOL_CACHE_DB, memory_entries: int = MEMORY_ENTRIES):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tool_cache (
+                tool TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL,
+                PRIMARY KEY (tool, key)
+            )
+            """
+        )
+        self.conn.execute("DELETE FROM tool_cache WHERE expires < ?", (time.time(),))
+        self.conn.commit()
+        self.memory: OrderedDict[Tuple[str, str], Tuple[str, float]] = OrderedDict()
+        self.memory_entries = memory_entries
+        self.in_flight: dict[Tuple[str, str], SharedLookup] = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def remember(self, tool: str, key: str, value: str, expires: float) -> None:
+        with self.lock:
+            self.memory[(tool, key)] = (value, expires)
+            self.memory.move_to_end((tool, key))
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def get_from_memory(self, tool: str, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.memory.get((tool, key))
+            if entry and entry[1] > time.time():
+                self.memory.move_to_end((tool, key))
+                return entry[0]
+        return None
+
+    def get(self, tool: str, key: str) -> Optional[str]:
+        value = self.get_from_memory(tool, key)
+        if value is not None:
+            return value
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires FROM tool_cache WHERE tool = ? AND key = ? AND expires > ?",
+                (tool, key, time.time()),
+            ).fetchone()
+        if row:
+            self.remember(tool, key, *row)
+            return row[0]
+        return None
+
+    def put(self, tool: str, key: str, value: str, ttl: float) -> None:
+        expires = time.time() + ttl
+        self.remember(tool, key, value, expires)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (tool, key, value, expires) VALUES (?, ?, ?, ?)",
+                (tool, key, value, expires),
+            )
+            self.conn.commit()
+
+    def record(self, tool: str, hit: bool) -> dict:
+        (self.hits if hit else self.misses)[tool] += 1
+        return {"cache": "hit" if hit else "miss", "hits": self.hits[tool], "misses": self.misses[tool]}
+
+    def run(self, tool: str, query: str, ttl: float, func: Callable[[str], str]) -> Tuple[str, dict]:
+        key = normalize_query(query)
+        value = self.get(tool, key)
+        if value is not None:
+            return value, self.record(tool, hit=True)
+        value = func(query)
+        self.put(tool, key, value, ttl)
+        return value, self.record(tool, hit=False)
+
+    async def arun(self, tool: str, query: str, ttl: float, coroutine: Callable[[str], Awaitable[str]]) -> Tuple[str, dict]:
+        key = normalize_query(query)
+        value = self.get_from_memory(tool, key)
+        if value is not None:
+            return value, self.record(tool, hit=True)
+        lookup = self.in_flight.get((tool, key))
+        joined = lookup is not None
+        if not joined:
+            lookup = SharedLookup(asyncio.create_task(self.lookup(tool, key, query, ttl, coroutine)))
+            self.in_flight[(tool, key)] = lookup
+
+            def finished(_: asyncio.Task) -> None:
+                if self.in_flight.get((tool, key)) is lookup:
+                    del self.in_flight[(tool, key)]
+
+            lookup.task.add_done_callback(finished)
+        lookup.waiters += 1
+        try:
+            value, hit = await asyncio.shield(lookup.task)
+        except asyncio.CancelledError:
+            if not lookup.task.done() and lookup.waiters == 1:
+                # Nobody else is waiting; later callers start a fresh lookup rather than join this cancelled one
+                if self.in_flight.get((tool, key)) is lookup:
+                    del self.in_flight[(tool, key)]
+                lookup.task.cancel()
+            raise
+        finally:
+            lookup.waiters -= 1
+        return value, self.record(tool, hit=hit or joined)
+
+    async def lookup(self, tool: str, key: str, query: str, ttl: float, coroutine: Callable[[str], Awaitable[str]]) -> Tuple[str, bool]:
+        """The lookup shared by everyone waiting on the key: the database, or else the tool"""
+        value = await asyncio.to_thread(self.get, tool, key)
+        if value is not None:
+            return value, True
+        value = await coroutine(query)
+        await asyncio.to_thread(self.put, tool, key, value, ttl)
+        return value, False
+
+    def stats(self) -> dict:
+        return {tool: {"hits": self.hits[tool], "misses": self.misses[tool]} for tool in self.hits | self.misses}
+
+
+def cached_tool(
+    cache: ToolCache,
+    name: str,
+    description: str,
+    ttl: float,
+    func: Callable[[str], str],
+    coroutine: Optional[Callable[[str], Awaitable[str]]] = None,
+) -> StructuredTool:
+    """
+    Wrap a single-query tool with the cache. The cache outcome and running hit and miss counts
+    are returned as the tool message's artifact, so they show in the trace without reaching the model.
+    """
+
+    def run(query: str) -> Tuple[str, dict]:
+        return cache.run(name, query, ttl, func)
+
+    async def arun(query: str) -> Tuple[str, dict]:
+        return await cache.arun(name, query, ttl, coroutine or (lambda q: asyncio.to_thread(func, q)))
+
+    return StructuredTool.from_function(
+        func=run,
+        coroutine=arun,
+        name=name,
+        description=description,
+        response_format="content_and_artifact",
+    )
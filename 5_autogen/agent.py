@@ -1,13 +1,18 @@
 from autogen_core import MessageContext, RoutedAgent, message_handler
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from model_pool import get_model_pool
+from mcp_workbench import get_mcp_pool, FETCH_MCP_SERVER
 import messages
+import os
 import random
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# With AGENT_FETCH_TOOL=true, agents can fetch web pages through one fetch server shared by every agent in the worker
+USE_FETCH_TOOL = os.getenv("AGENT_FETCH_TOOL", "false").strip().lower() == "true"
+
 class Agent(RoutedAgent):
 
     # Change this system message to reflect the unique characteristics of this agent
@@ -28,8 +33,15 @@ class Agent(RoutedAgent):
 
     def __init__(self, name) -> None:
         super().__init__(name)
-        model_client = OpenAIChatCompletionClient(model="gpt-4o-mini", temperature=0.7)
-        self._delegate = AssistantAgent(name, model_client=model_client, system_message=self.system_message)
+        model_client = get_model_pool().client(name, model="gpt-4o-mini", temperature=0.7)
+        workbench = get_mcp_pool().workbench(FETCH_MCP_SERVER) if USE_FETCH_TOOL else None
+        self._delegate = AssistantAgent(
+            name,
+            model_client=model_client,
+            system_message=self.system_message,
+            workbench=workbench,
+            reflect_on_tool_use=USE_FETCH_TOOL,
+        )
 
     @message_handler
     async def handle_message(self, message: messages.Message, ctx: MessageContext) -> messages.Message:
@@ -38,8 +50,8 @@ class Agent(RoutedAgent):
         response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
         idea = response.chat_message.content
         if random.random() < self.CHANCES_THAT_I_BOUNCE_IDEA_OFF_ANOTHER:
-            recipient = messages.find_recipient()
-            message = f"Here is my business idea. It may not be your speciality, but please refine it and make it better. {idea}"
-            response = await self.send_message(messages.Message(content=message), recipient)
-            idea = response.content
-        return messages.Message(content=idea)
\ No newline at end of file
+            request = f"Here is my business idea. It may not be your speciality, but please refine it and make it better. {idea}"
+            refined = await messages.bounce(self, message, request)
+            if refined:
+                return refined
+        return messages.reply(message, idea)
\ No newline at end of file
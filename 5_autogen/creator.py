@@ -1,13 +1,25 @@
 from autogen_core import MessageContext, RoutedAgent, message_handler
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_core.models import AssistantMessage, SystemMessage, UserMessage
+from model_pool import get_model_pool
 import messages
 from autogen_core import TRACE_LOGGER_NAME
+import asyncio
 import importlib
+import os
 import logging
 from autogen_core import AgentId
 from dotenv import load_dotenv
+from placement import Placement, creator_type
+from registry import sectors_of
+from jobs import get_job_store
+from generation import (
+    GENERATION_CONCURRENCY,
+    GENERATION_RETRIES,
+    generation_stats,
+    load_template,
+    strip_code_fence,
+    validate_agent_code,
+)
 
 load_dotenv(override=True)
 
@@ -17,6 +29,16 @@ logger.addHandler(logging.StreamHandler())
 logger.setLevel(logging.DEBUG)
 
 
+def write_module(filename: str, code: str) -> None:
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(code)
+
+
+def import_module(agent_name: str):
+    importlib.invalidate_caches()
+    return importlib.import_module(agent_name)
+
+
 class Creator(RoutedAgent):
 
     # Change this system message to reflect the unique characteristics of this agent
@@ -34,32 +56,90 @@ class Creator(RoutedAgent):
     """
 
 
-    def __init__(self, name) -> None:
+    def __init__(self, name, worker: int = 0, placement: Placement | None = None) -> None:
         super().__init__(name)
-        model_client = OpenAIChatCompletionClient(model="gpt-4o-mini", temperature=1.0)
-        self._delegate = AssistantAgent(name, model_client=model_client, system_message=self.system_message)
+        self.worker = worker
+        self.placement = placement
+        # Each generation is a fresh conversation with the model, so requests can run side by side
+        self._model_client = get_model_pool().client(name, model="gpt-4o-mini", temperature=1.0)
+        self._generation = asyncio.Semaphore(GENERATION_CONCURRENCY)
 
-    def get_user_prompt(self):
+    def get_user_prompt(self, template: str):
         prompt = "Please generate a new Agent based strictly on this template. Stick to the class structure. \
             Respond only with the python code, no other text, and no markdown code blocks.\n\n\
             Be creative about taking the agent in a new direction, but don't change method signatures.\n\n\
             Here is the template:\n\n"
-        with open("agent.py", "r", encoding="utf-8") as f:
-            template = f.read()
-        return prompt + template   
-        
+        return prompt + template
+
+    async def generate_code(self, filename: str, cancellation_token) -> str:
+        """Ask the model for a new agent, and ask again with the problem if the code isn't a valid agent module"""
+        template = await asyncio.to_thread(load_template)
+        prompt = [SystemMessage(content=self.system_message), UserMessage(content=self.get_user_prompt(template), source="user")]
+        for attempt in range(GENERATION_RETRIES + 1):
+            generation_stats.attempts += 1
+            async with self._generation:
+                result = await self._model_client.create(prompt, cancellation_token=cancellation_token)
+            code = strip_code_fence(result.content)
+            problem = await asyncio.to_thread(validate_agent_code, code, filename)
+            if not problem:
+                return code
+            generation_stats.invalid += 1
+            logger.warning(f"** Generated code for {filename} is invalid (attempt {attempt + 1}): {problem}")
+            prompt += [
+                AssistantMessage(content=code, source=self.id.type),
+                UserMessage(content=f"{problem}. Please fix this and respond with the whole module again.", source="user"),
+            ]
+        raise ValueError(f"Could not generate a valid agent for {filename}: {problem}")
 
     @message_handler
     async def handle_my_message_type(self, message: messages.Message, ctx: MessageContext) -> messages.Message:
         filename = message.content
         agent_name = filename.split(".")[0]
-        text_message = TextMessage(content=self.get_user_prompt(), source="user")
-        response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(response.chat_message.content)
+        store = get_job_store()
+        job = await asyncio.to_thread(store.get, agent_name)
+        if job and job.code:
+            # An earlier run generated this agent before it stopped; use its code rather than paying for it again
+            generation_stats.resumed += 1
+            code = job.code
+        else:
+            generation_stats.request()
+            try:
+                code = await self.generate_code(filename, ctx.cancellation_token)
+            except Exception:
+                generation_stats.failed += 1
+                raise
+            await asyncio.to_thread(store.generated, agent_name, code)
+            generation_stats.create()
+        await asyncio.to_thread(write_module, filename, code)
         print(f"** Creator has created python code for agent {agent_name} - about to register with Runtime")
-        module = importlib.import_module(agent_name)
+        worker = self.placement.place(agent_name) if self.placement else self.worker
+        if worker == self.worker:
+            await self.register_agent(agent_name)
+        else:
+            await self.send_message(messages.RegisterAgent(agent_name=agent_name), AgentId(creator_type(worker), "default"))
+        await asyncio.to_thread(store.advance, agent_name, "messaged")
+        result = await self.send_message(messages.start_chain("Give me an idea"), AgentId(agent_name, "default"))
+        return messages.Message(content=result.content, hops=result.hops)
+
+    async def register_agent(self, agent_name: str) -> None:
+        store = get_job_store()
+        if not os.path.exists(f"{agent_name}.py"):
+            job = await asyncio.to_thread(store.get, agent_name)
+            await asyncio.to_thread(write_module, f"{agent_name}.py", job.code)
+        module = await asyncio.to_thread(import_module, agent_name)
         await module.Agent.register(self.runtime, agent_name, lambda: module.Agent(agent_name))
-        logger.info(f"** Agent {agent_name} is live")
-        result = await self.send_message(messages.Message(content="Give me an idea"), AgentId(agent_name, "default"))
-        return messages.Message(content=result.content)
\ No newline at end of file
+        await asyncio.to_thread(store.advance, agent_name, "registered")
+        sectors = sectors_of(getattr(module.Agent, "system_message", ""))
+        await self.send_message(
+            messages.AgentRegistered(agent_type=agent_name, sectors=sectors), AgentId(messages.REGISTRY_TYPE, "default")
+        )
+        logger.info(f"** Agent {agent_name} is live on worker {self.worker}")
+
+    @message_handler
+    async def handle_register_agent(self, message: messages.RegisterAgent, ctx: MessageContext) -> messages.Message:
+        """
+        Another worker's Creator wrote this agent, and the placement table put it on this worker;
+        or the world is bringing back an agent that was finished in an earlier run
+        """
+        await self.register_agent(message.agent_name)
+        return messages.Message(content=f"{message.agent_name} is live on worker {self.worker}")
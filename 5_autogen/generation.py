@@ -0,0 +1,106 @@
+import ast
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "8"))
+GENERATION_RETRIES = int(os.getenv("GENERATION_RETRIES", "2"))
+CODE_FENCE = re.compile(r"^```[a-zA-Z]*\n(.*?)\n?```\s*$", re.DOTALL)
+
+_templates: Dict[str, Tuple[float, str]] = {}
+
+
+def load_template(path: str = "agent.py") -> str:
+    """The agent template, read from disk only when the file has changed"""
+    mtime = os.path.getmtime(path)
+    cached = _templates.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        template = f.read()
+    _templates[path] = (mtime, template)
+    return template
+
+
+def strip_code_fence(code: str) -> str:
+    """The model is asked not to, but sometimes wraps its code in a markdown block anyway"""
+    match = CODE_FENCE.match(code.strip())
+    return match.group(1) if match else code
+
+
+def decorator_names(function: ast.AsyncFunctionDef | ast.FunctionDef) -> set:
+    return {d.id if isinstance(d, ast.Name) else getattr(d, "attr", "") for d in function.decorator_list}
+
+
+def validate_agent_code(code: str, filename: str = "<agent>") -> Optional[str]:
+    """
+    Check generated code before it's written and imported: it must compile, and define a class Agent(RoutedAgent)
+    whose __init__ takes a name and which has an async message handler taking a message and a context.
+
+    Returns:
+        The problem as a message for the model, or None if the code is fine
+    """
+    try:
+        tree = compile(code, filename, "exec", flags=ast.PyCF_ONLY_AST)
+        compile(tree, filename, "exec")
+    except SyntaxError as e:
+        return f"The code does not compile: {e.msg} on line {e.lineno}"
+    agent = next((node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == "Agent"), None)
+    if agent is None:
+        return "The code must define a class named Agent at the top level"
+    bases = {b.id if isinstance(b, ast.Name) else getattr(b, "attr", "") for b in agent.bases}
+    if "RoutedAgent" not in bases:
+        return "The Agent class must inherit from RoutedAgent"
+    methods = [node for node in agent.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    init = next((m for m in methods if m.name == "__init__"), None)
+    if init is None or [a.arg for a in init.args.args] != ["self", "name"]:
+        return "The Agent class must have an __init__(self, name) method"
+    handlers = [m for m in methods if "message_handler" in decorator_names(m)]
+    if not any(isinstance(m, ast.AsyncFunctionDef) and len(m.args.args) == 3 for m in handlers):
+        return "The Agent class must keep its async @message_handler method taking (self, message, ctx)"
+    return None
+
+
+@dataclass
+class GenerationStats:
+    """How agent generation is going in this process"""
+
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    requested: int = 0
+    created: int = 0
+    failed: int = 0
+    attempts: int = 0
+    invalid: int = 0
+    resumed: int = 0
+
+    def request(self) -> None:
+        self.started = self.started or time.monotonic()
+        self.requested += 1
+
+    def create(self) -> None:
+        self.created += 1
+        self.finished = time.monotonic()
+
+    @property
+    def agents_per_minute(self) -> float:
+        elapsed = self.finished - self.started if self.finished else 0.0
+        return self.created / elapsed * 60 if elapsed > 0 else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        """The share of generated modules that were invalid and had to be retried or given up on"""
+        return self.invalid / self.attempts if self.attempts else 0.0
+
+    def report(self) -> str:
+        return (
+            f"{self.created}/{self.requested} agents created, {self.failed} failed, "
+            f"{self.agents_per_minute:.1f} agents/minute, {self.attempts} generations with "
+            f"{self.failure_rate:.0%} invalid"
+            + (f", {self.resumed} resumed from an earlier run" if self.resumed else "")
+        )
+
+
+generation_stats = GenerationStats()
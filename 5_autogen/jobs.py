@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+WORLD_DB = os.getenv("WORLD_DB", "world.db")
+STAGES = ["pending", "generated", "registered", "messaged", "completed"]
+
+_store = None
+
+
+@dataclass
+class Job:
+    agent_name: str
+    stage: str
+    code: Optional[str]
+    result: Optional[str]
+    error: Optional[str]
+    attempts: int
+
+    def reached(self, stage: str) -> bool:
+        return STAGES.index(self.stage) >= STAGES.index(stage)
+
+
+class JobStore:
+    """
+    The world's job table: one row per agent, with the stage it has reached, its generated code and its idea.
+    The driver and every worker process open the same SQLite file, so a rerun of world.py picks up where the
+    last run stopped: finished agents are kept, and an agent whose code was generated isn't generated again.
+    """
+
+    def __init__(self, path: str = WORLD_DB):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                agent_name TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                code TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def execute(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self.lock:
+            rows = self.conn.execute(sql, parameters).fetchall()
+            self.conn.commit()
+        return rows
+
+    def add(self, agent_names: Iterable[str]) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (agent_name, stage, updated) VALUES (?, 'pending', ?)",
+                [(name, time.time()) for name in agent_names],
+            )
+            self.conn.commit()
+
+    def get(self, agent_name: str) -> Optional[Job]:
+        rows = self.execute(
+            "SELECT agent_name, stage, code, result, error, attempts FROM jobs WHERE agent_name = ?", (agent_name,)
+        )
+        return Job(*rows[0]) if rows else None
+
+    def names(self, completed: bool) -> List[str]:
+        rows = self.execute(f"SELECT agent_name FROM jobs WHERE stage {'=' if completed else '!='} 'completed'")
+        return [row[0] for row in rows]
+
+    def advance(self, agent_name: str, stage: str) -> None:
+        """Move a job on to a later stage; a job never moves back, e.g. when a finished agent is registered again"""
+        self.execute(
+            f"UPDATE jobs SET stage = ?, updated = ? WHERE agent_name = ? AND stage IN ({','.join('?' * STAGES.index(stage))})",
+            (stage, time.time(), agent_name, *STAGES[: STAGES.index(stage)]),
+        )
+
+    def generated(self, agent_name: str, code: str) -> None:
+        self.execute(
+            "INSERT INTO jobs (agent_name, stage, code, updated) VALUES (?, 'generated', ?, ?) "
+            "ON CONFLICT(agent_name) DO UPDATE SET stage = 'generated', code = excluded.code, updated = excluded.updated",
+            (agent_name, code, time.time()),
+        )
+
+    def completed(self, agent_name: str, result: str) -> None:
+        self.execute(
+            "UPDATE jobs SET stage = 'completed', result = ?, error = NULL, updated = ? WHERE agent_name = ?",
+            (result, time.time(), agent_name),
+        )
+
+    def failed(self, agent_name: str, error: str) -> None:
+        self.execute(
+            "UPDATE jobs SET error = ?, attempts = attempts + 1, updated = ? WHERE agent_name = ?",
+            (error, time.time(), agent_name),
+        )
+
+    def summary(self) -> Dict[str, int]:
+        counts = dict(self.execute("SELECT stage, COUNT(*) FROM jobs GROUP BY stage"))
+        return {stage: counts.get(stage, 0) for stage in STAGES}
+
+
+def get_job_store() -> JobStore:
+    """The job store for this process"""
+    global _store
+    if _store is None:
+        _store = JobStore()
+    return _store
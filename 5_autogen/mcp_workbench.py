@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from autogen_core import CancellationToken
+from autogen_core.tools import ToolResult, ToolSchema, Workbench
+from autogen_ext.tools.mcp import McpServerParams, McpWorkbench, StdioServerParams
+
+MCP_CACHE_TTL = int(os.getenv("MCP_CACHE_TTL_SECONDS", str(60 * 60)))
+MCP_CACHEABLE_TOOLS = set(os.getenv("MCP_CACHEABLE_TOOLS", "fetch").split(","))
+MCP_CACHE_ENTRIES = 1024
+FETCH_MCP_SERVER = StdioServerParams(command="uvx", args=["mcp-server-fetch"])
+
+_pool = None
+
+
+def server_key(server_params: McpServerParams) -> str:
+    return server_params.model_dump_json()
+
+
+class SharedCall:
+    """A tool call in flight, and how many callers are still waiting for it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class McpSession:
+    """
+    One live connection to an MCP server, shared by every agent in the process that uses the same server config.
+    The tool list is fetched once. Results of idempotent tools are cached for `ttl` seconds, and identical calls
+    that arrive while one is in flight wait for it rather than calling the server again.
+    A caller that is cancelled stops waiting without cancelling the call for the others; the call itself is
+    cancelled only once nobody is waiting for it.
+    """
+
+    def __init__(self, server_params: McpServerParams, ttl: float, cacheable: set, max_entries: int = MCP_CACHE_ENTRIES):
+        self.workbench = McpWorkbench(server_params)
+        self.ttl = ttl
+        self.cacheable = cacheable
+        self.max_entries = max_entries
+        self.tools: Optional[List[ToolSchema]] = None
+        self.started = False
+        self.lock = asyncio.Lock()
+        self.responses: OrderedDict[Tuple[str, str], Tuple[ToolResult, float]] = OrderedDict()
+        self.in_flight: Dict[Tuple[str, str], SharedCall] = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    async def start(self) -> None:
+        async with self.lock:
+            if not self.started:
+                await self.workbench.start()
+                self.started = True
+
+    async def list_tools(self) -> List[ToolSchema]:
+        if self.tools is None:
+            await self.start()
+            async with self.lock:
+                if self.tools is None:
+                    self.tools = await self.workbench.list_tools()
+        return self.tools
+
+    async def call_tool(
+        self, name: str, arguments: Optional[Mapping[str, Any]], cancellation_token: Optional[CancellationToken]
+    ) -> ToolResult:
+        await self.start()
+        if name not in self.cacheable:
+            return await self.workbench.call_tool(name, arguments, cancellation_token)
+        key = (name, json.dumps(arguments or {}, sort_keys=True))
+        entry = self.responses.get(key)
+        if entry and entry[1] > time.time():
+            self.responses.move_to_end(key)
+            self.hits[name] += 1
+            return entry[0]
+        call = self.in_flight.get(key)
+        if call:
+            self.hits[name] += 1
+        else:
+            self.misses[name] += 1
+            call = SharedCall(asyncio.create_task(self.fetch(key, name, arguments)))
+            self.in_flight[key] = call
+
+            def finished(_: asyncio.Task) -> None:
+                if self.in_flight.get(key) is call:
+                    del self.in_flight[key]
+
+            call.task.add_done_callback(finished)
+        call.waiters += 1
+        waiter = asyncio.shield(call.task)
+        if cancellation_token:
+            cancellation_token.link_future(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                # Nobody else is waiting; later callers start a fresh call rather than join this cancelled one
+                if self.in_flight.get(key) is call:
+                    del self.in_flight[key]
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def fetch(self, key: Tuple[str, str], name: str, arguments: Optional[Mapping[str, Any]]) -> ToolResult:
+        """The call shared by everyone waiting on the key; it has no caller's cancellation token, since it may outlive them"""
+        result = await self.workbench.call_tool(name, arguments)
+        if not result.is_error:
+            self.responses[key] = (result, time.time() + self.ttl)
+            while len(self.responses) > self.max_entries:
+                self.responses.popitem(last=False)
+        return result
+
+    async def close(self) -> None:
+        if self.started:
+            await self.workbench.stop()
+            self.started = False
+
+
+class SharedMcpWorkbench(Workbench):
+    """
+    An agent's handle on a shared MCP session; pass it to AssistantAgent as its workbench.
+    Starting and stopping it is left to the pool, so one agent finishing can't close the server under the others.
+    """
+
+    def __init__(self, session: McpSession):
+        self.session = session
+
+    async def list_tools(self) -> List[ToolSchema]:
+        return await self.session.list_tools()
+
+    async def call_tool(
+        self, name: str, arguments: Mapping[str, Any] | None = None, cancellation_token: CancellationToken | None = None
+    ) -> ToolResult:
+        return await self.session.call_tool(name, arguments, cancellation_token)
+
+    async def start(self) -> None:
+        await self.session.start()
+
+    async def stop(self) -> None:
+        """The pool stops the session when the worker shuts down"""
+
+    async def reset(self) -> None:
+        pass
+
+    async def save_state(self) -> Mapping[str, Any]:
+        return {}
+
+    async def load_state(self, state: Mapping[str, Any]) -> None:
+        pass
+
+
+class McpWorkbenchPool:
+    """One MCP session per server config for every agent in this worker process, instead of a server process per agent"""
+
+    def __init__(self, ttl: float = MCP_CACHE_TTL, cacheable: set = MCP_CACHEABLE_TOOLS):
+        self.ttl = ttl
+        self.cacheable = cacheable
+        self.sessions: Dict[str, McpSession] = {}
+
+    def workbench(self, server_params: McpServerParams) -> SharedMcpWorkbench:
+        key = server_key(server_params)
+        if key not in self.sessions:
+            self.sessions[key] = McpSession(server_params, self.ttl, self.cacheable)
+        return SharedMcpWorkbench(self.sessions[key])
+
+    def report(self) -> str:
+        lines = []
+        for session in self.sessions.values():
+            for name in sorted(set(session.hits) | set(session.misses)):
+                lines.append(f"{name}: {session.hits[name]} cache hits, {session.misses[name]} calls to the server")
+        return "\n".join(lines)
+
+    async def close(self) -> None:
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions.clear()
+
+
+def get_mcp_pool() -> McpWorkbenchPool:
+    """The MCP sessions shared by every agent in this process"""
+    global _pool
+    if _pool is None:
+        _pool = McpWorkbenchPool()
+    return _pool
+
+
+STUB_SERVER = """
+from mcp.server.fastmcp import FastMCP
+mcp = FastMCP("stub")
+calls = {"fetch": 0, "now": 0}
+
+@mcp.tool()
+def fetch(url: str) -> str:
+    calls["fetch"] += 1
+    return f"{url} fetch {calls['fetch']}"
+
+@mcp.tool()
+def now() -> str:
+    calls["now"] += 1
+    return f"now {calls['now']}"
+
+mcp.run()
+"""
+
+
+async def check(agents: int = 20) -> None:
+    """Many agents' workbenches against a local stub server: one session, one tool listing, one call per fetch"""
+    pool = McpWorkbenchPool(ttl=60, cacheable={"fetch"})
+    params = StdioServerParams(command=sys.executable, args=["-c", STUB_SERVER])
+    # Each agent builds its own params, equal to the others
+    workbenches = [pool.workbench(params.model_copy()) for _ in range(agents)]
+    assert len(pool.sessions) == 1, "agents with the same server config should share one session"
+    session = pool.sessions[server_key(params)]
+    listings = Counter()
+    list_tools = session.workbench.list_tools
+
+    async def counted_list_tools():
+        listings["list_tools"] += 1
+        return await list_tools()
+
+    session.workbench.list_tools = counted_list_tools
+    try:
+        tools = await asyncio.gather(*[workbench.list_tools() for workbench in workbenches])
+        assert all({tool["name"] for tool in listed} == {"fetch", "now"} for listed in tools)
+        assert listings["list_tools"] == 1, f"the tools were listed {listings['list_tools']} times"
+
+        results = await asyncio.gather(*[workbench.call_tool("fetch", {"url": "https://example.com"}) for workbench in workbenches])
+        assert {result.to_text() for result in results} == {"https://example.com fetch 1"}, "concurrent fetches should share one call"
+        later = await workbenches[0].call_tool("fetch", {"url": "https://example.com"})
+        assert later.to_text() == "https://example.com fetch 1", "a repeated fetch should come from the cache"
+        other = await workbenches[1].call_tool("fetch", {"url": "https://example.org"})
+        assert other.to_text() == "https://example.org fetch 2", "a different url should reach the server"
+        assert session.hits["fetch"] == agents and session.misses["fetch"] == 2
+
+        first, second = [(await workbench.call_tool("now", {})).to_text() for workbench in workbenches[:2]]
+        assert (first, second) == ("now 1", "now 2"), "tools that aren't idempotent should never be cached"
+
+        await workbenches[0].stop()
+        assert session.started, "one agent stopping its workbench should leave the shared session running"
+        print(pool.report())
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(check())
+    print("MCP workbench checks passed")
@@ -1,24 +1,111 @@
-from dataclasses import dataclass
-from autogen_core import AgentId
-import glob
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+from autogen_core import AgentId, RoutedAgent
+import asyncio
 import os
+import time
 
+REGISTRY_TYPE = "Registry"
+MAX_HOPS = int(os.getenv("MAX_REFINEMENT_HOPS", "3"))
+CHAIN_BUDGET_SECONDS = float(os.getenv("CHAIN_BUDGET_SECONDS", "60"))
 
-import random
 
 @dataclass
 class Message:
+    """
+    An idea on its way through the world. Requests carry how many agents they've been through, which agents those
+    were, and a deadline (wall-clock seconds since the epoch, so it means the same on every worker); the reply to a
+    refinement chain carries the chain's length back in hops.
+    """
+
     content: str
+    hops: int = 0
+    visited: List[str] = field(default_factory=list)
+    deadline: float = 0.0
+
+
+@dataclass
+class RegisterAgent:
+    agent_name: str
+
+
+@dataclass
+class AgentRegistered:
+    agent_type: str
+    sectors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FindRecipient:
+    sender: str
+    exclude: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ReleaseRecipient:
+    agent_type: str
+
+
+REGISTRY_MESSAGES = [Message, AgentRegistered, FindRecipient, ReleaseRecipient]
+
+
+def start_chain(content: str, budget: float = CHAIN_BUDGET_SECONDS) -> Message:
+    return Message(content=content, deadline=time.time() + budget)
+
 
+def reply(message: Message, content: str) -> Message:
+    return Message(content=content, hops=message.hops)
 
-def find_recipient() -> AgentId:
+
+def remaining(message: Message) -> float:
+    return message.deadline - time.time() if message.deadline else CHAIN_BUDGET_SECONDS
+
+
+@asynccontextmanager
+async def find_recipient(agent: RoutedAgent, message: Optional[Message] = None) -> AsyncIterator[Optional[AgentId]]:
+    """
+    Ask the registry for a live agent to refine this agent's idea; it counts as busy until the block exits.
+    Yields None if there is no other agent yet, or if the message has used up its hops or its time.
+    Agents the message has already been through are never chosen, so a chain can't go round in a cycle.
+    """
+    message = message or Message(content="")
+    if message.hops >= MAX_HOPS or remaining(message) <= 0:
+        yield None
+        return
+    registry = AgentId(REGISTRY_TYPE, "default")
     try:
-        agent_files = glob.glob("agent*.py")
-        agent_names = [os.path.splitext(file)[0] for file in agent_files]
-        agent_names.remove("agent")
-        agent_name = random.choice(agent_names)
-        print(f"Selecting agent for refinement: {agent_name}")
-        return AgentId(agent_name, "default")
+        found = await agent.send_message(FindRecipient(sender=agent.id.type, exclude=message.visited), registry)
     except Exception as e:
         print(f"Exception finding recipient: {e}")
-        return AgentId("agent1", "default")
+        yield None
+        return
+    if not found.content:
+        yield None
+        return
+    print(f"Selecting agent for refinement: {found.content}")
+    try:
+        yield AgentId(found.content, "default")
+    finally:
+        await agent.send_message(ReleaseRecipient(agent_type=found.content), registry)
+
+
+async def bounce(agent: RoutedAgent, message: Message, content: str) -> Optional[Message]:
+    """
+    Pass an idea on to another agent to refine, within what's left of the message's hops and time.
+    Returns the refined idea, or None if there was no one to ask or they didn't answer in time.
+    """
+    async with find_recipient(agent, message) as recipient:
+        if not recipient:
+            return None
+        request = Message(
+            content=content,
+            hops=message.hops + 1,
+            visited=message.visited + [agent.id.type],
+            deadline=message.deadline or time.time() + CHAIN_BUDGET_SECONDS,
+        )
+        try:
+            return await asyncio.wait_for(agent.send_message(request, recipient), remaining(request))
+        except asyncio.TimeoutError:
+            print(f"{recipient.type} ran out of time refining the idea from {agent.id.type}")
+            return None
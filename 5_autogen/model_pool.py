@@ -0,0 +1,208 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Dict, Mapping, Optional, Sequence, Tuple, Union
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from openai import APIConnectionError
+
+MODEL_CONCURRENCY = int(os.getenv("MODEL_CONCURRENCY", "16"))
+MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "6"))
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+_pool = None
+
+
+def openai_client(model: str, temperature: float) -> ChatCompletionClient:
+    # The pool does the retrying, so that a 429 slows down every agent on the worker, not just the one that saw it;
+    # it retries the transient errors the SDK would have retried too
+    return OpenAIChatCompletionClient(model=model, temperature=temperature, max_retries=0)
+
+
+def is_rate_limit(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying on their own: dropped connections, timeouts and server errors, as the OpenAI SDK retries"""
+    if isinstance(error, (APIConnectionError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status in (408, 409) or status >= 500)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class AgentUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    rate_limited: int = 0
+    retried: int = 0
+
+
+class ModelClientPool:
+    """
+    One model client per (model, temperature) for every agent in this worker process, so agents share the
+    client's connection pool instead of opening their own.
+    Calls are limited to `concurrency` at once across all agents; when the provider answers 429, every call waits
+    out an exponential backoff (or the provider's retry-after) before trying again. Transient errors (connection
+    errors, timeouts, 5xx) are retried with a backoff for just the call that saw them.
+    Token usage is added up per agent type.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = MODEL_CONCURRENCY,
+        factory: Callable[[str, float], ChatCompletionClient] = openai_client,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.concurrency = concurrency
+        self.factory = factory
+        self.max_retries = max_retries
+        self.clients: Dict[Tuple[str, float], ChatCompletionClient] = {}
+        self.usage: Dict[str, AgentUsage] = {}
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.paused_until = 0.0
+
+    def client(self, agent_type: str, model: str = "gpt-4o-mini", temperature: float = 0.7) -> "PooledModelClient":
+        key = (model, temperature)
+        if key not in self.clients:
+            self.clients[key] = self.factory(model, temperature)
+        self.usage.setdefault(agent_type, AgentUsage())
+        return PooledModelClient(self, self.clients[key], agent_type)
+
+    async def call(self, agent_type: str, make_call: Callable[[], Any]) -> CreateResult:
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        usage = self.usage.setdefault(agent_type, AgentUsage())
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(max(0.0, self.paused_until - time.monotonic()))
+            backoff = 0.0
+            async with self.semaphore:
+                try:
+                    result = await make_call()
+                    break
+                except Exception as e:
+                    if not (is_rate_limit(e) or is_transient(e)) or attempt == self.max_retries:
+                        raise
+                    delay = retry_after(e) or min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2**attempt) * random.uniform(0.5, 1.0)
+                    if is_rate_limit(e):
+                        usage.rate_limited += 1
+                        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                    else:
+                        usage.retried += 1
+                        backoff = delay
+            # Outside the semaphore, so the backoff doesn't hold up other agents' calls
+            await asyncio.sleep(backoff)
+        usage.calls += 1
+        usage.prompt_tokens += result.usage.prompt_tokens
+        usage.completion_tokens += result.usage.completion_tokens
+        return result
+
+    def report(self) -> str:
+        lines = [
+            f"{agent_type}: {u.calls} calls, {u.prompt_tokens} prompt + {u.completion_tokens} completion tokens"
+            + (f", {u.rate_limited} rate limited" if u.rate_limited else "")
+            + (f", {u.retried} retried" if u.retried else "")
+            for agent_type, u in sorted(self.usage.items())
+            if u.calls or u.rate_limited or u.retried
+        ]
+        return "\n".join(lines)
+
+    async def close(self) -> None:
+        for client in self.clients.values():
+            await client.close()
+        self.clients.clear()
+
+
+class PooledModelClient(ChatCompletionClient):
+    """An agent's handle on the pool's shared client; it goes through the pool's limits and counts the agent's usage"""
+
+    def __init__(self, pool: ModelClientPool, client: ChatCompletionClient, agent_type: str):
+        self.pool = pool
+        self.client = client
+        self.agent_type = agent_type
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        return await self.pool.call(
+            self.agent_type,
+            lambda: self.client.create(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            ),
+        )
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # Streams aren't retried, since the agent may have seen some of the output already; one non-streamed call
+        # through the pool gives the same limits and accounting
+        yield await self.create(
+            messages,
+            tools=tools,
+            json_output=json_output,
+            extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token,
+        )
+
+    async def close(self) -> None:
+        """The shared client stays open for the other agents; the pool closes it"""
+
+    def actual_usage(self) -> RequestUsage:
+        usage = self.pool.usage[self.agent_type]
+        return RequestUsage(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+    def total_usage(self) -> RequestUsage:
+        return self.actual_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self.client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.client.model_info
+
+
+def get_model_pool() -> ModelClientPool:
+    """The pool shared by every agent in this process"""
+    global _pool
+    if _pool is None:
+        _pool = ModelClientPool()
+    return _pool
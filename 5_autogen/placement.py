@@ -0,0 +1,51 @@
+import bisect
+import hashlib
+from typing import Dict, List
+
+VIRTUAL_NODES = 64
+
+
+def creator_type(worker: int) -> str:
+    """Each worker runs its own Creator, which also registers the agents placed on that worker"""
+    return f"Creator{worker}" if worker else "Creator"
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing of agent types onto workers. Each worker owns many points on the ring,
+    so agent types spread evenly, and adding a worker only moves the types that land on its points.
+    """
+
+    def __init__(self, workers: int, virtual_nodes: int = VIRTUAL_NODES):
+        self.workers = workers
+        points = sorted((ring_hash(f"worker{w}#{v}"), w) for w in range(workers) for v in range(virtual_nodes))
+        self.hashes = [h for h, _ in points]
+        self.owners = [w for _, w in points]
+
+    def worker_for(self, agent_type: str) -> int:
+        index = bisect.bisect(self.hashes, ring_hash(agent_type)) % len(self.hashes)
+        return self.owners[index]
+
+
+class Placement:
+    """
+    The placement table: which worker each agent type lives on.
+    A type is placed by the ring the first time it's seen and then stays put, so agents that are already
+    registered don't move if the ring changes.
+    """
+
+    def __init__(self, workers: int):
+        self.ring = HashRing(workers)
+        self.table: Dict[str, int] = {}
+
+    def place(self, agent_type: str) -> int:
+        if agent_type not in self.table:
+            self.table[agent_type] = self.ring.worker_for(agent_type)
+        return self.table[agent_type]
+
+    def agents_on(self, worker: int) -> List[str]:
+        return [agent_type for agent_type, w in self.table.items() if w == worker]
@@ -0,0 +1,171 @@
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Generic, Iterable, List, Optional, Set, TypeVar
+from autogen_core import MessageContext, RoutedAgent, message_handler
+import messages
+
+RECIPIENT_POLICY = os.getenv("RECIPIENT_POLICY", "least_loaded")
+CHOICES = 2
+ATTEMPTS = 4
+SECTORS_PATTERN = re.compile(r"interests? (?:are|is) in (?:these |the )?sectors?:\s*([^\n]+)", re.IGNORECASE)
+
+T = TypeVar("T")
+
+
+def sectors_of(system_message: str) -> List[str]:
+    """The sectors named in an agent's system message, e.g. 'Your personal interests are in these sectors: Healthcare, Education.'"""
+    match = SECTORS_PATTERN.search(system_message or "")
+    if not match:
+        return []
+    names = re.split(r",|\band\b", match.group(1).rstrip(". "))
+    return [name.strip().lower() for name in names if name.strip()]
+
+
+class IndexedSet(Generic[T]):
+    """A set with O(1) add, remove and random sample: a list of items plus each item's position in it"""
+
+    def __init__(self):
+        self.items: List[T] = []
+        self.positions: Dict[T, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, item: T) -> None:
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item: T) -> None:
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+    def sample(self) -> T:
+        return self.items[random.randrange(len(self.items))]
+
+
+@dataclass
+class AgentInfo:
+    agent_type: str
+    sectors: List[str] = field(default_factory=list)
+    load: int = 0
+    last_used: float = 0.0
+
+
+class RandomPolicy:
+    """Any live agent other than the sender (and the agents the idea has already been through), as find_recipient used to choose"""
+
+    def candidates(self, registry: "AgentRegistry", sender: AgentInfo | None) -> IndexedSet[str]:
+        return registry.types
+
+    def choose(self, registry: "AgentRegistry", sender: AgentInfo | None, exclude: Set[str]) -> Optional[AgentInfo]:
+        candidates = self.candidates(registry, sender)
+        choices = [registry.agents[candidates.sample()] for _ in range(min(CHOICES, len(candidates)))]
+        choices = [agent for agent in choices if agent.agent_type not in exclude]
+        return self.best(choices)
+
+    def best(self, choices: List[AgentInfo]) -> Optional[AgentInfo]:
+        return choices[0] if choices else None
+
+
+class LeastLoadedPolicy(RandomPolicy):
+    """
+    The less busy of two agents sampled at random, or the one idle for longer when they tie.
+    Two random choices keep the selection O(1) and spread load almost as well as scanning every agent.
+    """
+
+    def best(self, choices: List[AgentInfo]) -> Optional[AgentInfo]:
+        return min(choices, key=lambda agent: (agent.load, agent.last_used), default=None)
+
+
+class InterestPolicy(LeastLoadedPolicy):
+    """The less busy of two agents that share a sector with the sender, falling back to any agent"""
+
+    def candidates(self, registry: "AgentRegistry", sender: AgentInfo | None) -> IndexedSet[str]:
+        sectors = [s for s in (sender.sectors if sender else []) if len(registry.sectors.get(s, ())) > 1]
+        if not sectors:
+            return registry.types
+        return registry.sectors[random.choice(sectors)]
+
+
+POLICIES = {"random": RandomPolicy, "least_loaded": LeastLoadedPolicy, "interest": InterestPolicy}
+
+
+class AgentRegistry:
+    """
+    The live agent types in the world, with their sectors, how many refinements each is working on, and when it was
+    last chosen. Only agents that are registered with the runtime are in it, and choosing a recipient never
+    touches the filesystem.
+    """
+
+    def __init__(self, policy: RandomPolicy | None = None):
+        self.policy = policy or POLICIES[RECIPIENT_POLICY]()
+        self.agents: Dict[str, AgentInfo] = {}
+        self.types: IndexedSet[str] = IndexedSet()
+        self.sectors: Dict[str, IndexedSet[str]] = {}
+
+    def register(self, agent_type: str, sectors: List[str]) -> None:
+        self.unregister(agent_type)
+        self.agents[agent_type] = AgentInfo(agent_type, sectors)
+        self.types.add(agent_type)
+        for sector in sectors:
+            self.sectors.setdefault(sector, IndexedSet()).add(agent_type)
+
+    def unregister(self, agent_type: str) -> None:
+        agent = self.agents.pop(agent_type, None)
+        if not agent:
+            return
+        self.types.remove(agent_type)
+        for sector in agent.sectors:
+            self.sectors[sector].remove(agent_type)
+
+    def acquire(self, sender: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """Choose a recipient for the sender's idea, other than the excluded agents, and count it as busy until it's released"""
+        exclude = {sender, *exclude}
+        if len(self.types) - sum(agent_type in self.agents for agent_type in exclude) < 1:
+            return None
+        agent = None
+        for _ in range(ATTEMPTS):
+            agent = self.policy.choose(self, self.agents.get(sender), exclude)
+            if agent:
+                break
+        if not agent:
+            return None
+        agent.load += 1
+        agent.last_used = time.monotonic()
+        return agent.agent_type
+
+    def release(self, agent_type: str) -> None:
+        agent = self.agents.get(agent_type)
+        if agent and agent.load > 0:
+            agent.load -= 1
+
+
+class Registry(RoutedAgent):
+    """The registry service: Creators tell it about each agent they register, and agents ask it who to bounce an idea to"""
+
+    def __init__(self, name, policy: RandomPolicy | None = None) -> None:
+        super().__init__(name)
+        self.registry = AgentRegistry(policy)
+
+    @message_handler
+    async def handle_agent_registered(self, message: messages.AgentRegistered, ctx: MessageContext) -> messages.Message:
+        self.registry.register(message.agent_type, message.sectors)
+        return messages.Message(content=message.agent_type)
+
+    @message_handler
+    async def handle_find_recipient(self, message: messages.FindRecipient, ctx: MessageContext) -> messages.Message:
+        return messages.Message(content=self.registry.acquire(message.sender, message.exclude) or "")
+
+    @message_handler
+    async def handle_release_recipient(self, message: messages.ReleaseRecipient, ctx: MessageContext) -> messages.Message:
+        self.registry.release(message.agent_type)
+        return messages.Message(content=message.agent_type)
@@ -0,0 +1,85 @@
+"""
+Microbenchmark for choosing who to bounce an idea to, with thousands of agent types.
+Compares the old glob of agent*.py files with the in-memory registry under each selection policy,
+and shows how evenly each policy spreads refinements across agents.
+
+Run with: uv run registry_benchmark.py
+"""
+
+import glob
+import os
+import random
+import statistics
+import tempfile
+import time
+from registry import POLICIES, AgentRegistry
+
+AGENT_COUNTS = [1_000, 5_000, 20_000]
+LOOKUPS = 2_000
+SECTORS = ["healthcare", "education", "finance", "retail", "logistics", "media", "energy", "travel"]
+LOAD_AGENTS = 1_000
+IN_FLIGHT = 10_000
+
+
+def glob_recipient() -> str:
+    """find_recipient before the registry"""
+    agent_names = [os.path.splitext(file)[0] for file in glob.glob("agent*.py")]
+    agent_names.remove("agent")
+    return random.choice(agent_names)
+
+
+def glob_lookup_us(count: int) -> float:
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(count + 1):
+            open(os.path.join(directory, f"agent{i or ''}.py"), "w").close()
+        os.chdir(directory)
+        try:
+            lookups = max(LOOKUPS // count * 10, 20)
+            start = time.perf_counter()
+            for _ in range(lookups):
+                glob_recipient()
+            return (time.perf_counter() - start) / lookups * 1e6
+        finally:
+            os.chdir(cwd)
+
+
+def make_registry(policy: str, count: int) -> AgentRegistry:
+    registry = AgentRegistry(POLICIES[policy]())
+    for i in range(1, count + 1):
+        registry.register(f"agent{i}", random.sample(SECTORS, 2))
+    return registry
+
+
+def registry_lookup_us(policy: str, count: int) -> float:
+    registry = make_registry(policy, count)
+    senders = [f"agent{random.randint(1, count)}" for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for sender in senders:
+        registry.release(registry.acquire(sender))
+    return (time.perf_counter() - start) / LOOKUPS * 1e6
+
+
+def busiest_agent(policy: str) -> tuple[int, float]:
+    """Hand out refinements without releasing them, then report the busiest agent against the mean"""
+    registry = make_registry(policy, LOAD_AGENTS)
+    for _ in range(IN_FLIGHT):
+        registry.acquire(f"agent{random.randint(1, LOAD_AGENTS)}")
+    loads = [agent.load for agent in registry.agents.values()]
+    return max(loads), statistics.mean(loads)
+
+
+def main():
+    print(f"Microseconds to choose a recipient (mean of up to {LOOKUPS} lookups)")
+    for count in AGENT_COUNTS:
+        timings = {"glob": glob_lookup_us(count)}
+        timings.update({policy: registry_lookup_us(policy, count) for policy in POLICIES})
+        print(f"{count:>7} agent types: " + "  ".join(f"{name} {us:,.1f}" for name, us in timings.items()))
+    print(f"Busiest agent after {IN_FLIGHT} refinements in flight across {LOAD_AGENTS} agents")
+    for policy in POLICIES:
+        busiest, mean = busiest_agent(policy)
+        print(f"{policy:>13}: {busiest} (mean {mean:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import asyncio
+import time
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+STUB_REPLY = "A marketplace where AI agents negotiate freight capacity for small shippers."
+
+
+class StubChatCompletionClient(ReplayChatCompletionClient):
+    """
+    A local stand-in for the OpenAI client, for benchmarks: every call burns cpu_ms of CPU (the work an agent does
+    around a model call), waits latency seconds for the "model", and answers with the same reply.
+    """
+
+    def __init__(self, reply: str = STUB_REPLY, latency: float = 0.05, cpu_ms: float = 5.0):
+        super().__init__([reply])
+        self.latency = latency
+        self.cpu_ms = cpu_ms
+
+    async def create(self, messages, **kwargs):
+        end = time.perf_counter() + self.cpu_ms / 1000
+        while time.perf_counter() < end:
+            pass
+        await asyncio.sleep(self.latency)
+        self.reset()
+        return await super().create(messages, **kwargs)
@@ -0,0 +1,130 @@
+import difflib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+TICKETS_DB = os.getenv("TICKETS_DB", "tickets.db")
+CHECK_INTERVAL_SECONDS = 1.0
+FUZZY_CUTOFF = 0.75
+
+_indexes: Dict[str, "PriceIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+def normalize_city(city_name: str) -> str:
+    return " ".join(city_name.casefold().split())
+
+
+class PriceIndex:
+    """
+    The cities table of tickets.db held in memory, keyed by case-folded city name, so a price lookup never touches the
+    database. The file is watched: at most once every CHECK_INTERVAL_SECONDS a lookup checks the database's
+    modification time, and reloads the table if it has changed.
+    Names that don't match exactly are matched to the closest city, e.g. "Barcelonna" or "rome, italy".
+    Lookups run in tool threads, so a reload swaps in a new (prices, matches) table in one assignment, each lookup
+    reads one table throughout, and reloads are serialized under the lock.
+    """
+
+    def __init__(self, path: str = TICKETS_DB, check_interval: float = CHECK_INTERVAL_SECONDS, cutoff: float = FUZZY_CUTOFF):
+        self.path = path
+        self.check_interval = check_interval
+        self.cutoff = cutoff
+        self.lock = threading.Lock()
+        self.table: Tuple[Dict[str, float], Dict[str, Optional[str]]] = ({}, {})
+        self.version: Tuple[float, ...] = ()
+        self.checked = 0.0
+        self.loads = 0
+        self.load()
+
+    def file_version(self) -> Tuple[float, ...]:
+        """Writes in WAL mode land in the -wal file first, so watch it too"""
+        version = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                stat = os.stat(path)
+                version += [stat.st_mtime_ns, stat.st_size]
+            except FileNotFoundError:
+                version += [0, 0]
+        return tuple(version)
+
+    def load(self) -> None:
+        with self.lock:
+            self.reload()
+
+    def reload(self) -> None:
+        """Called holding the lock"""
+        version = self.file_version()
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute("SELECT city_name, round_trip_price FROM cities").fetchall()
+        finally:
+            conn.close()
+        self.table = ({normalize_city(city): price for city, price in rows}, {})
+        self.version = version
+        self.loads += 1
+
+    def refresh(self) -> Tuple[Dict[str, float], Dict[str, Optional[str]]]:
+        """The current table, reloaded first if the database has changed"""
+        if time.monotonic() - self.checked >= self.check_interval:
+            with self.lock:
+                # Another thread may have checked while this one waited for the lock
+                now = time.monotonic()
+                if now - self.checked >= self.check_interval:
+                    self.checked = now
+                    if self.file_version() != self.version:
+                        self.reload()
+        return self.table
+
+    def match(self, city_name: str, table: Tuple[Dict[str, float], Dict[str, Optional[str]]]) -> Optional[str]:
+        """The city in the table for a name: an exact case-folded match, or else the closest name above the cutoff"""
+        prices, matches = table
+        key = normalize_city(city_name)
+        if key in prices:
+            return key
+        if key not in matches:
+            candidates = [key] + [part.strip() for part in key.split(",")]
+            closest = None
+            for candidate in candidates:
+                found = difflib.get_close_matches(candidate, prices.keys(), n=1, cutoff=self.cutoff)
+                if found:
+                    closest = found[0]
+                    break
+            matches[key] = closest
+        return matches[key]
+
+    def price(self, city_name: str) -> Optional[float]:
+        table = self.refresh()
+        city = self.match(city_name, table)
+        return table[0][city] if city else None
+
+    def prices_for(self, city_names: List[str]) -> Dict[str, Optional[dict]]:
+        table = self.refresh()
+        results = {}
+        for name in city_names:
+            city = self.match(name, table)
+            results[name] = {"city": city, "round_trip_price": table[0][city]} if city else None
+        return results
+
+
+def get_price_index(path: str = TICKETS_DB) -> PriceIndex:
+    """The index for a tickets database, loaded on first use and shared from then on"""
+    path = os.path.abspath(path)
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = PriceIndex(path)
+        return _indexes[path]
+
+
+def get_city_price(city_name: str) -> float | None:
+    """Get the roundtrip ticket price to travel to the city"""
+    return get_price_index().price(city_name)
+
+
+def get_city_prices(city_names: list[str]) -> dict:
+    """
+    Get the roundtrip ticket prices to travel to several cities at once.
+    Returns each requested name with the city it matched and its price, or null if there is no such city.
+    """
+    return get_price_index().prices_for(city_names)
@@ -0,0 +1,74 @@
+"""
+Microbenchmark for the ticket price tool: the lab's lookup, which opens tickets.db for every call, against the
+in-memory index in ticket_prices.py, for single, batch and misspelled lookups, on the lab's 6 cities and on a
+synthetic table of 10,000 cities.
+
+Run with: uv run ticket_prices_benchmark.py
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from ticket_prices import PriceIndex
+
+LOOKUPS = 5_000
+SYNTHETIC_CITIES = 10_000
+BATCH = ["London", "Paris", "Rome", "Madrid", "Barcelona", "Berlin"]
+MISSPELLED = ["Londn", "PARIS ", "Barcelonna", "rome, italy", "Berln", "Madird"]
+
+
+def get_city_price(path: str, city_name: str) -> float | None:
+    """The lab's tool: a new connection for every call"""
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("SELECT round_trip_price FROM cities WHERE city_name = ?", (city_name.lower(),))
+    result = c.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+
+def synthetic_db(directory: str) -> str:
+    path = os.path.join(directory, "synthetic.db")
+    shutil.copy("tickets.db", path)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "REPLACE INTO cities (city_name, round_trip_price) VALUES (?, ?)",
+        [(f"city {i}", random.randint(100, 1500)) for i in range(SYNTHETIC_CITIES)],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def per_call_us(function, names, lookups: int = LOOKUPS) -> float:
+    start = time.perf_counter()
+    for i in range(lookups):
+        function(names[i % len(names)])
+    return (time.perf_counter() - start) / lookups * 1e6
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for label, path in [("6 cities", "tickets.db"), (f"{SYNTHETIC_CITIES:,} cities", synthetic_db(directory))]:
+            start = time.perf_counter()
+            index = PriceIndex(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            print(f"{label}: index loaded in {load_ms:.1f}ms")
+            timings = {
+                "connection per call": per_call_us(lambda name: get_city_price(path, name), BATCH),
+                "index": per_call_us(index.price, BATCH),
+                "index, misspelled": per_call_us(index.price, MISSPELLED),
+                "connection per call, batch of 6": per_call_us(lambda _: [get_city_price(path, n) for n in BATCH], [0], LOOKUPS // 10),
+                "index, batch of 6": per_call_us(lambda _: index.prices_for(BATCH), [0]),
+            }
+            for name, us in timings.items():
+                print(f"  {name:>32}: {us:8.1f}us")
+            matched = sum(index.price(name) is not None for name in MISSPELLED)
+            print(f"  misspelled names matched: {matched}/{len(MISSPELLED)}, database loads: {index.loads}")
+
+
+if __name__ == "__main__":
+    main()
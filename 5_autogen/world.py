@@ -2,31 +2,171 @@ from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntimeHost
 from agent import Agent
 from creator import Creator
 from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntime
-from autogen_core import AgentId
+from autogen_core import AgentId, try_get_known_serializers_for_type
+from placement import Placement, creator_type
+from registry import Registry
+from model_pool import get_model_pool
+from mcp_workbench import get_mcp_pool
+from generation import generation_stats
+from jobs import get_job_store
 import messages
 import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from collections import Counter
+from typing import List
 
-HOW_MANY_AGENTS = 20
+HOW_MANY_AGENTS = int(os.getenv("HOW_MANY_AGENTS", "20"))
+WORKERS = int(os.getenv("WORLD_WORKERS", "4"))
+CREATION_CONCURRENCY = int(os.getenv("CREATION_CONCURRENCY", "10"))
+HOST_ADDRESS = os.getenv("WORLD_HOST_ADDRESS", "localhost:50051")
 
-async def create_and_message(worker, creator_id, i: int):
+
+class WorkerRuntime(GrpcWorkerAgentRuntime):
+    """
+    The host matches each response to its request by the request id and the worker that answers it, and every runtime
+    counts its request ids up from 1, so two runtimes calling agents on the same worker would mix up their replies.
+    Prefixing the ids with a per-runtime id keeps them apart.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._request_prefix = uuid.uuid4().hex[:12]
+
+    async def _get_new_request_id(self) -> str:
+        return f"{self._request_prefix}-{await super()._get_new_request_id()}"
+
+
+async def serve_worker(index: int, workers: int, host_address: str, ready, stop):
+    """
+    One worker process: its own runtime, with a Creator that registers the agents placed on this worker.
+    The first worker also runs the registry of live agents.
+    """
+    worker = WorkerRuntime(host_address=host_address)
+    await worker.start()
+    for message_type in messages.REGISTRY_MESSAGES:
+        worker.add_message_serializer(try_get_known_serializers_for_type(message_type))
+    if index == 0:
+        await Registry.register(worker, messages.REGISTRY_TYPE, lambda: Registry(messages.REGISTRY_TYPE))
+    name = creator_type(index)
+    await Creator.register(worker, name, lambda: Creator(name, worker=index, placement=Placement(workers)))
+    ready.set()
+    await asyncio.to_thread(stop.wait)
+    await worker.stop()
+    if generation_stats.requested:
+        print(f"Agent generation on worker {index}: {generation_stats.report()}")
+    pool = get_model_pool()
+    if pool.report():
+        print(f"Token usage on worker {index}:\n{pool.report()}")
+    await pool.close()
+    await get_mcp_pool().close()
+
+
+def run_worker(index: int, workers: int, host_address: str, ready, stop):
+    asyncio.run(serve_worker(index, workers, host_address, ready, stop))
+
+
+def start_workers(workers: int, host_address: str, target=run_worker):
+    """Start the worker processes and wait until each has registered its agents with the host"""
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    processes, ready = [], []
+    for index in range(workers):
+        event = context.Event()
+        process = context.Process(target=target, args=(index, workers, host_address, event, stop), daemon=True)
+        process.start()
+        processes.append(process)
+        ready.append(event)
+    for event in ready:
+        event.wait()
+    return processes, stop
+
+
+def stop_workers(processes, stop):
+    stop.set()
+    for process in processes:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+
+
+class ChainStats:
+    """End-to-end latency of each creation request, and how many agents its idea went through"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.hops: Counter = Counter()
+
+    def record(self, latency: float, hops: int) -> None:
+        self.latencies.append(latency)
+        self.hops[hops] += 1
+
+    def report(self) -> str:
+        if not self.latencies:
+            return "No ideas came back"
+        latencies = sorted(self.latencies)
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+        chains = ", ".join(f"{hops} hops: {count}" for hops, count in sorted(self.hops.items()))
+        return (
+            f"Latency p50 {percentile(0.5):.1f}s, p90 {percentile(0.9):.1f}s, p99 {percentile(0.99):.1f}s, "
+            f"max {latencies[-1]:.1f}s\nRefinement chains: {chains}"
+        )
+
+
+async def create_and_message(worker, creator_id, i: int, semaphore: asyncio.Semaphore, stats: ChainStats):
+    store = get_job_store()
     try:
-        result = await worker.send_message(messages.Message(content=f"agent{i}.py"), creator_id)
+        async with semaphore:
+            start = time.perf_counter()
+            result = await worker.send_message(messages.Message(content=f"agent{i}.py"), creator_id)
+            stats.record(time.perf_counter() - start, result.hops)
         with open(f"idea{i}.md", "w") as f:
             f.write(result.content)
+        await asyncio.to_thread(store.completed, f"agent{i}", result.content)
     except Exception as e:
+        await asyncio.to_thread(store.failed, f"agent{i}", str(e))
         print(f"Failed to run worker {i} due to exception: {e}")
 
+
+async def restore_agent(worker, agent_name: str, placement: Placement):
+    try:
+        creator_id = AgentId(creator_type(placement.place(agent_name)), "default")
+        await worker.send_message(messages.RegisterAgent(agent_name=agent_name), creator_id)
+    except Exception as e:
+        print(f"Failed to restore {agent_name} due to exception: {e}")
+
 async def main():
-    host = GrpcWorkerAgentRuntimeHost(address="localhost:50051")
-    host.start() 
-    worker = GrpcWorkerAgentRuntime(host_address="localhost:50051")
+    host = GrpcWorkerAgentRuntimeHost(address=HOST_ADDRESS)
+    host.start()
+    processes, stop = await asyncio.to_thread(start_workers, WORKERS, HOST_ADDRESS)
+    # This runtime only sends requests, so it has no agents to register the message serializers for it
+    worker = WorkerRuntime(host_address=HOST_ADDRESS)
+    for message_type in [messages.Message, messages.RegisterAgent]:
+        worker.add_message_serializer(try_get_known_serializers_for_type(message_type))
     await worker.start()
-    result = await Creator.register(worker, "Creator", lambda: Creator("Creator"))
-    creator_id = AgentId("Creator", "default")
-    coroutines = [create_and_message(worker, creator_id, i) for i in range(1, HOW_MANY_AGENTS+1)]
+    store = get_job_store()
+    store.add(f"agent{i}" for i in range(1, HOW_MANY_AGENTS+1))
+    finished = set(store.names(completed=True))
+    print(f"{len(finished)} of {HOW_MANY_AGENTS} agents were finished in an earlier run; running the rest")
+    # Bring the finished agents back to life, so they can refine the new agents' ideas
+    placement = Placement(WORKERS)
+    await asyncio.gather(*[restore_agent(worker, name, placement) for name in sorted(finished)])
+    semaphore = asyncio.Semaphore(CREATION_CONCURRENCY)
+    stats = ChainStats()
+    # Spread the creation requests over the Creators, so the model calls and agents are shared by the workers
+    coroutines = [
+        create_and_message(worker, AgentId(creator_type(i % WORKERS), "default"), i, semaphore, stats)
+        for i in range(1, HOW_MANY_AGENTS+1)
+        if f"agent{i}" not in finished
+    ]
     await asyncio.gather(*coroutines)
+    print(stats.report())
+    print(f"Jobs by stage: {store.summary()}")
     try:
         await worker.stop()
+        await asyncio.to_thread(stop_workers, processes, stop)
         await host.stop()
     except Exception as e:
         print(e)
@@ -36,5 +176,3 @@ async def main():
 
 if __name__ == "__main__":
     asyncio.run(main())
-
-
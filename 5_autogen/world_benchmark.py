@@ -0,0 +1,105 @@
+"""
+Scaling benchmark for the sharded agent world, against a local stub model so no API calls are made.
+Places stub agent types across 1, 2 and 4 worker processes with the consistent-hash ring, sends them
+a fixed batch of messages through the gRPC host, and reports messages per second for each world size.
+
+Run with: uv run world_benchmark.py
+"""
+
+import asyncio
+import os
+import time
+from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler, try_get_known_serializers_for_type
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import TextMessage
+from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntimeHost
+from placement import Placement
+from stub_model import StubChatCompletionClient
+from world import WorkerRuntime, start_workers, stop_workers
+import messages
+
+WORLD_SIZES = [1, 2, 4]
+AGENT_TYPES = 200
+MESSAGES = int(os.getenv("BENCHMARK_MESSAGES", "1000"))
+CONCURRENCY = 100
+LATENCY = 0.05
+CPU_MS = 5.0
+BASE_PORT = 50060
+
+
+class StubAgent(RoutedAgent):
+    def __init__(self, name) -> None:
+        super().__init__(name)
+        model_client = StubChatCompletionClient(latency=LATENCY, cpu_ms=CPU_MS)
+        self._delegate = AssistantAgent(name, model_client=model_client, system_message="You are a stub entrepreneur.")
+
+    @message_handler
+    async def handle_message(self, message: messages.Message, ctx: MessageContext) -> messages.Message:
+        text_message = TextMessage(content=message.content, source="user")
+        response = await self._delegate.on_messages([text_message], ctx.cancellation_token)
+        return messages.Message(content=response.chat_message.content)
+
+
+def agent_type(i: int) -> str:
+    return f"stub{i}"
+
+
+async def serve_stub_worker(index: int, workers: int, host_address: str, ready, stop):
+    worker = WorkerRuntime(host_address=host_address)
+    await worker.start()
+    placement = Placement(workers)
+    for i in range(AGENT_TYPES):
+        name = agent_type(i)
+        if placement.place(name) == index:
+            await StubAgent.register(worker, name, lambda name=name: StubAgent(name))
+    ready.set()
+    await asyncio.to_thread(stop.wait)
+    await worker.stop()
+
+
+def run_stub_worker(index: int, workers: int, host_address: str, ready, stop):
+    asyncio.run(serve_stub_worker(index, workers, host_address, ready, stop))
+
+
+async def messages_per_second(workers: int) -> float:
+    address = f"localhost:{BASE_PORT + workers}"
+    host = GrpcWorkerAgentRuntimeHost(address=address)
+    host.start()
+    processes, stop = await asyncio.to_thread(start_workers, workers, address, run_stub_worker)
+    driver = WorkerRuntime(host_address=address)
+    driver.add_message_serializer(try_get_known_serializers_for_type(messages.Message))
+    await driver.start()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def send(i: int):
+        async with semaphore:
+            await driver.send_message(messages.Message(content="Give me an idea"), AgentId(agent_type(i % AGENT_TYPES), "default"))
+
+    # Warm up, so each agent is instantiated before the clock starts
+    await asyncio.gather(*[send(i) for i in range(AGENT_TYPES)])
+    start = time.perf_counter()
+    await asyncio.gather(*[send(i) for i in range(MESSAGES)])
+    elapsed = time.perf_counter() - start
+    await driver.stop()
+    await asyncio.to_thread(stop_workers, processes, stop)
+    await host.stop()
+    return MESSAGES / elapsed
+
+
+async def main():
+    print(f"{MESSAGES} messages to {AGENT_TYPES} agent types, {CONCURRENCY} in flight")
+    print(f"Stub model latency {LATENCY}s and {CPU_MS:.0f}ms of CPU per message")
+    placement = Placement(max(WORLD_SIZES))
+    for i in range(AGENT_TYPES):
+        placement.place(agent_type(i))
+    spread = [len(placement.agents_on(w)) for w in range(max(WORLD_SIZES))]
+    print(f"Agent types per worker with {max(WORLD_SIZES)} workers: {spread}")
+    baseline = None
+    for workers in WORLD_SIZES:
+        rate = await messages_per_second(workers)
+        baseline = baseline or rate
+        print(f"{workers} worker{'s' if workers > 1 else ' '}: {rate:7.1f} messages/sec ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
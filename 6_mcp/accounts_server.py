@@ -1,5 +1,6 @@
 from mcp.server.fastmcp import FastMCP
 from accounts import Account
+from analytics import leaderboard
 
 mcp = FastMCP("accounts_server")
 
@@ -56,6 +57,14 @@ async def change_strategy(name: str, strategy: str) -> str:
     """
     return Account.get(name).change_strategy(strategy)
 
+@mcp.tool()
+async def get_leaderboard() -> list[dict]:
+    """Get performance metrics for every trader, best first: portfolio value, total return,
+    annualized volatility, Sharpe ratio, maximum drawdown and turnover, plus each trader's exposure
+    to the symbols they hold and the correlation of their daily returns with the other traders.
+    """
+    return leaderboard()
+
 @mcp.resource("accounts://accounts_server/{name}")
 async def read_account_resource(name: str) -> str:
     account = Account.get(name.lower())
@@ -0,0 +1,218 @@
+import json
+import numpy as np
+import pandas as pd
+from accounts import INITIAL_BALANCE
+from database import read_all_accounts
+from market import price_store
+
+DAYS_PER_YEAR = 365.25
+
+_cache = {"version": None, "result": None}
+
+
+def latest_prices(transactions: pd.DataFrame) -> pd.Series:
+    """Mark each symbol at the latest stored close, falling back to its last traded price"""
+    marks = transactions.groupby("symbol")["price"].last()
+    dates = price_store.dates()
+    if dates:
+        closes = pd.Series(price_store.cross_section(dates[-1]))
+        marks = closes.reindex(marks.index).fillna(marks)
+    return marks
+
+
+def daily_values(accounts: list[dict]) -> pd.DataFrame:
+    """Each trader's last portfolio value per day, one column per trader, NaN on days the trader has no value"""
+    names = [account["name"] for account in accounts]
+    series = [account["portfolio_value_time_series"] for account in accounts]
+    points = [point for points in series for point in points]
+    if not points:
+        return pd.DataFrame(columns=names, dtype=float)
+    codes = np.repeat(np.arange(len(names)), [len(points) for points in series])
+    times, values = zip(*points)
+    days = np.array(times, dtype="datetime64[s]").astype("datetime64[D]")
+    first = days.min()
+    offsets = (days - first).astype(np.int64)
+    span = offsets.max() + 1
+    # Points are appended in time order, so the last occurrence of each (trader, day) is the close
+    keys = (codes * span + offsets)[::-1]
+    _, reversed_index = np.unique(keys, return_index=True)
+    last = len(keys) - 1 - reversed_index
+    matrix = np.full((span, len(names)), np.nan)
+    matrix[offsets[last], codes[last]] = np.array(values)[last]
+    dates = pd.date_range(first, periods=span, freq="D")
+    return pd.DataFrame(matrix, index=dates, columns=names).dropna(how="all")
+
+
+def periodic_returns(daily: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Each trader's return from one day with a value to the next, and how many such periods make a year.
+    Days without a value are skipped rather than counted as flat, and the periods per year come from the
+    average gap between a trader's values, e.g. about 252 for values on weekdays.
+    """
+    previous = daily.ffill().shift()
+    returns = daily / previous - 1
+    observed = pd.DataFrame(
+        np.where(daily.notna(), daily.index.values[:, None], np.datetime64("NaT", "ns")),
+        index=daily.index,
+        columns=daily.columns,
+    )
+    gaps = (observed - observed.ffill().shift()).apply(lambda gap: gap.dt.days)
+    periods_per_year = DAYS_PER_YEAR / gaps.where(returns.notna()).mean()
+    return returns, periods_per_year
+
+
+def trades_and_holdings(accounts: list[dict]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Every trader's transactions and current holdings as long frames with a trader column"""
+    names = [account["name"] for account in accounts]
+    trades = [account["transactions"] for account in accounts]
+    transactions = pd.DataFrame(
+        [trade for batch in trades for trade in batch], columns=["symbol", "quantity", "price"]
+    )
+    transactions["trader"] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(names)), [len(batch) for batch in trades]), categories=names
+    )
+    holdings = pd.DataFrame(
+        [
+            (account["name"], symbol, quantity)
+            for account in accounts
+            for symbol, quantity in account["holdings"].items()
+        ],
+        columns=["trader", "symbol", "quantity"],
+    )
+    return transactions, holdings
+
+
+def compute_analytics(accounts: list[dict]) -> dict[str, pd.DataFrame]:
+    """
+    Compute performance metrics for all traders together.
+
+    Returns:
+        dict: "metrics" (one row per trader), "correlations" (trader by trader, of daily returns)
+        and "exposure" (trader by symbol, as a fraction of portfolio value)
+    """
+    names = [account["name"] for account in accounts]
+    daily = daily_values(accounts)
+    transactions, holdings = trades_and_holdings(accounts)
+
+    returns, periods_per_year = periodic_returns(daily)
+    mean, std = returns.mean(), returns.std()
+    drawdown = (daily / daily.cummax() - 1).min()
+    latest = daily.ffill().iloc[-1] if len(daily) else pd.Series(INITIAL_BALANCE, index=names)
+    latest = latest.fillna(INITIAL_BALANCE)
+
+    notional = (
+        (transactions["quantity"].abs() * transactions["price"])
+        .groupby(transactions["trader"], observed=False)
+        .sum()
+    )
+    average_value = daily.mean().fillna(INITIAL_BALANCE)
+
+    marks = latest_prices(transactions)
+    holdings["value"] = holdings["quantity"] * holdings["symbol"].map(marks).fillna(0.0)
+    exposure = (
+        holdings.pivot_table(
+            index="trader", columns="symbol", values="value", aggfunc="sum", fill_value=0.0
+        )
+        .reindex(names, fill_value=0.0)
+        .div(latest, axis=0)
+    )
+
+    metrics = pd.DataFrame(
+        {
+            "value": latest,
+            "return": latest / INITIAL_BALANCE - 1,
+            "volatility": std * np.sqrt(periods_per_year),
+            "sharpe": mean / std.replace(0, np.nan) * np.sqrt(periods_per_year),
+            "max_drawdown": drawdown,
+            "turnover": notional.reindex(names, fill_value=0.0) / average_value,
+        },
+        index=pd.Index(names, name="trader"),
+    ).sort_values("value", ascending=False)
+
+    return {"metrics": metrics, "correlations": returns.corr(), "exposure": exposure}
+
+
+def portfolio_analytics() -> dict[str, pd.DataFrame]:
+    """Analytics for every trader, recomputed only when an account has changed since the last call"""
+    rows = read_all_accounts()
+    version = hash(tuple(rows))
+    if _cache["version"] != version:
+        _cache["result"] = compute_analytics([json.loads(account) for _, account in rows])
+        _cache["version"] = version
+    return _cache["result"]
+
+
+def leaderboard() -> list[dict]:
+    """
+    The metrics for every trader as plain records, best first, with None where a metric is undefined.
+    Each record also has the trader's exposure to each symbol held, and the correlation of their daily returns
+    with each other trader's where there are enough days in common.
+    """
+    analytics = portfolio_analytics()
+    metrics = analytics["metrics"].round(4).reset_index().astype(object)
+    records = metrics.where(metrics.notna(), None).to_dict("records")
+    exposure, correlations = analytics["exposure"].round(4), analytics["correlations"].round(4)
+    for record in records:
+        trader = record["trader"]
+        held = exposure.loc[trader] if trader in exposure.index else pd.Series(dtype=float)
+        record["exposure"] = held[held != 0].to_dict()
+        paired = correlations[trader].drop(trader).dropna() if trader in correlations else pd.Series(dtype=float)
+        record["correlations"] = paired.to_dict()
+    return records
+
+
+def largest_positions(exposure: pd.DataFrame) -> pd.Series:
+    """Each trader's largest holding and its share of their portfolio, e.g. "NVDA 34.0%", or "" for none"""
+    if exposure.columns.empty:
+        return pd.Series("", index=exposure.index)
+    shares = exposure.abs()
+    largest = shares.max(axis=1)
+    return (shares.idxmax(axis=1) + " " + largest.map("{:.1%}".format)).where(largest > 0, "")
+
+
+def most_correlated(correlations: pd.DataFrame) -> pd.Series:
+    """The other trader whose daily returns move most like each trader's, e.g. "warren 0.82", or "" for none"""
+    if correlations.columns.empty:
+        return pd.Series("", index=correlations.index, dtype=object)
+    others = correlations.mask(np.eye(len(correlations), dtype=bool))
+    highest = others.max(axis=1)
+    closest = others.fillna(-np.inf).idxmax(axis=1).astype(str)
+    return (closest + " " + highest.map("{:.2f}".format)).where(highest.notna(), "")
+
+
+def synthetic_accounts(traders: int, days: int, seed: int = 42) -> list[dict]:
+    """Random accounts with a portfolio value every trading hour, for timing the analytics"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2020-01-01 09:00", periods=days * 7, freq="h").strftime("%Y-%m-%d %H:%M:%S")
+    symbols = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META", "TSLA", "SPY"]
+    accounts = []
+    for i in range(traders):
+        path = INITIAL_BALANCE * np.exp(np.cumsum(rng.normal(0, 0.003, len(times))))
+        trades = [
+            {
+                "symbol": rng.choice(symbols),
+                "quantity": int(rng.integers(-20, 20)),
+                "price": float(rng.uniform(50, 500)),
+            }
+            for _ in range(days)
+        ]
+        accounts.append(
+            {
+                "name": f"trader{i}",
+                "holdings": {s: int(rng.integers(1, 50)) for s in symbols[: i % len(symbols) + 1]},
+                "transactions": trades,
+                "portfolio_value_time_series": list(zip(times, path.tolist())),
+            }
+        )
+    return accounts
+
+
+if __name__ == "__main__":
+    import time
+
+    accounts = synthetic_accounts(traders=100, days=750)
+    start = time.perf_counter()
+    result = compute_analytics(accounts)
+    elapsed = time.perf_counter() - start
+    print(result["metrics"].head(10))
+    print(f"Computed analytics for {len(accounts)} traders over 750 days in {elapsed:.3f}s")
@@ -1,10 +1,17 @@
 import gradio as gr
 from util import css, js, Color
 import pandas as pd
-from trading_floor import names, lastnames, short_model_names
+import asyncio
+import os
+import threading
+from trading_floor import names, lastnames, short_model_names, run_every_n_minutes
 import plotly.express as px
 from accounts import Account
 from database import read_log
+from analytics import portfolio_analytics, largest_positions, most_correlated
+from events import bus
+
+RUN_TRADING_FLOOR_IN_APP = os.getenv("RUN_TRADING_FLOOR_IN_APP", "false").strip().lower() == "true"
 
 mapper = {
     "trace": Color.WHITE,
@@ -13,6 +20,10 @@ mapper = {
     "generation": Color.YELLOW,
     "response": Color.MAGENTA,
     "account": Color.RED,
+    "schedule": Color.BLUE,
+    "tool_call": Color.GREEN,
+    "trade": Color.RED,
+    "appraisal": Color.YELLOW,
 }
 
 
@@ -92,6 +103,13 @@ class Trader:
             return response
         return gr.update()
 
+    def get_activity(self) -> str:
+        response = ""
+        for event in reversed(bus.recent_events(self.name)):
+            color = mapper.get(event.type, Color.WHITE).value
+            response += f"<span style='color:{color}'>{event.timestamp} : {event.message}</span><br/>"
+        return f"<div style='height:120px; overflow-y:auto;'>{response}</div>"
+
 
 class TraderView:
     def __init__(self, trader: Trader):
@@ -112,6 +130,8 @@ class TraderView:
                 )
             with gr.Row(variant="panel"):
                 self.log = gr.HTML(self.trader.get_logs)
+            with gr.Row(variant="panel"):
+                self.activity = gr.HTML(self.trader.get_activity)
             with gr.Row():
                 self.holdings_table = gr.Dataframe(
                     value=self.trader.get_holdings_df,
@@ -164,6 +184,73 @@ class TraderView:
             self.trader.get_transactions_df(),
         )
 
+    def stream_outputs(self) -> list:
+        return [
+            self.portfolio_value,
+            self.chart,
+            self.holdings_table,
+            self.transactions_table,
+            self.activity,
+        ]
+
+    async def stream(self):
+        """Push each event for this trader to the page as it happens, reloading the account after a trade"""
+        events = bus.subscribe(self.trader.name)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield (gr.update(),) * 5
+                    continue
+                if event.type == "trade":
+                    yield *await asyncio.to_thread(self.refresh), await asyncio.to_thread(self.trader.get_activity)
+                else:
+                    yield *(gr.update(),) * 4, await asyncio.to_thread(self.trader.get_activity)
+        finally:
+            bus.unsubscribe(self.trader.name, events)
+
+
+class LeaderboardView:
+    def __init__(self):
+        self.table = None
+
+    def get_leaderboard_df(self) -> pd.DataFrame:
+        """Rank the traders on performance metrics computed across all accounts"""
+        analytics = portfolio_analytics()
+        metrics = analytics["metrics"].reset_index()
+        metrics["position"] = metrics["trader"].map(largest_positions(analytics["exposure"])).fillna("")
+        metrics["correlated"] = metrics["trader"].map(most_correlated(analytics["correlations"])).fillna("").str.title()
+        metrics["trader"] = metrics["trader"].str.title()
+        metrics["value"] = metrics["value"].map("${:,.0f}".format)
+        for column in ["return", "volatility", "max_drawdown"]:
+            metrics[column] = metrics[column].map("{:.1%}".format)
+        for column in ["sharpe", "turnover"]:
+            metrics[column] = metrics[column].map("{:.2f}".format)
+        metrics.columns = [
+            "Trader", "Value", "Return", "Volatility", "Sharpe", "Max Drawdown", "Turnover",
+            "Largest Position", "Most Correlated",
+        ]
+        return metrics
+
+    def make_ui(self):
+        with gr.Row():
+            self.table = gr.Dataframe(
+                value=self.get_leaderboard_df,
+                label="Leaderboard",
+                col_count=9,
+                max_height=300,
+                elem_classes=["dataframe-fix-small"],
+            )
+        timer = gr.Timer(value=120)
+        timer.tick(
+            fn=self.get_leaderboard_df,
+            inputs=[],
+            outputs=[self.table],
+            show_progress="hidden",
+            queue=False,
+        )
+
 
 # Main UI construction
 def create_ui():
@@ -181,10 +268,23 @@ def create_ui():
         with gr.Row():
             for trader_view in trader_views:
                 trader_view.make_ui()
+        LeaderboardView().make_ui()
+        for trader_view in trader_views:
+            # Each stream runs for as long as its tab is open, so don't limit them, or a second tab would wait forever
+            ui.load(
+                trader_view.stream,
+                outputs=trader_view.stream_outputs(),
+                show_progress="hidden",
+                concurrency_limit=None,
+            )
 
     return ui
 
 
 if __name__ == "__main__":
+    if RUN_TRADING_FLOOR_IN_APP:
+        threading.Thread(target=lambda: asyncio.run(run_every_n_minutes()), daemon=True).start()
+    # Relay the events of a trading floor running in its own process with `uv run trading_floor.py`
+    bus.follow()
     ui = create_ui()
     ui.launch(inbrowser=True)
@@ -21,6 +21,36 @@ with sqlite3.connect(DB) as conn:
         )
     ''')
     cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            message TEXT,
+            created DATETIME,
+            batch TEXT,
+            claimed DATETIME,
+            sent DATETIME,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            failed DATETIME,
+            error TEXT
+        )
+    ''')
+    outbox_columns = {row[1] for row in cursor.execute('PRAGMA table_info(outbox)')}
+    for column, definition in [('attempts', 'INTEGER NOT NULL DEFAULT 0'), ('failed', 'DATETIME'), ('error', 'TEXT')]:
+        if column not in outbox_columns:
+            cursor.execute(f'ALTER TABLE outbox ADD COLUMN {column} {definition}')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (sent, batch)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            type TEXT,
+            message TEXT,
+            timestamp TEXT,
+            process INTEGER
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_name ON events (name, id)')
     conn.commit()
 
 def write_account(name, account_dict):
@@ -98,4 +128,151 @@ def read_market(date: str) -> dict | None:
         cursor = conn.cursor()
         cursor.execute('SELECT data FROM market WHERE date = ?', (date,))
         row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
\ No newline at end of file
+        return json.loads(row[0]) if row else None
+
+def write_outbox(name: str, message: str) -> bool:
+    """
+    Queue a notification in the outbox, unless the same message from the same name is already pending.
+
+    Returns:
+        bool: True if the message was queued, False if it was a duplicate
+    """
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO outbox (name, message, created)
+            SELECT ?, ?, datetime('now')
+            WHERE NOT EXISTS (
+                SELECT 1 FROM outbox WHERE name = ? AND message = ? AND sent IS NULL AND failed IS NULL
+            )
+        ''', (name.lower(), message, name.lower(), message))
+        conn.commit()
+        return cursor.rowcount > 0
+
+def claim_outbox(batch: str, stale_minutes: int = 5) -> list[tuple[int, str, str]]:
+    """
+    Claim every unsent notification for this batch, including claims abandoned by a crashed sender,
+    but not the ones that were given up on.
+
+    Returns:
+        list: A list of tuples containing (id, name, message), oldest first
+    """
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE outbox SET batch = ?, claimed = datetime('now')
+            WHERE sent IS NULL AND failed IS NULL AND (batch IS NULL OR claimed < datetime('now', ?))
+        ''', (batch, f"-{stale_minutes} minutes"))
+        cursor.execute(
+            'SELECT id, name, message FROM outbox WHERE batch = ? AND sent IS NULL AND failed IS NULL ORDER BY id',
+            (batch,),
+        )
+        rows = cursor.fetchall()
+        conn.commit()
+        return rows
+
+def complete_outbox(
+    batch: str,
+    sent: bool,
+    attempts: int = 0,
+    max_attempts: int = 0,
+    error: str | None = None,
+    ids: list[int] | None = None,
+) -> int:
+    """
+    Mark claimed notifications as sent, or count their failed delivery attempts and release them so that they are
+    retried later. Applies to the given ids of the batch, or to all of its unsent notifications.
+    Notifications that have had max_attempts are given up on: they keep the last error and are never claimed again.
+    A max_attempts of 0 gives up on them straight away.
+
+    Returns:
+        int: The number of notifications given up on
+    """
+    rows = f" AND id IN ({', '.join('?' * len(ids))})" if ids is not None else ""
+    parameters = tuple(ids or ())
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        if sent:
+            cursor.execute(
+                f"UPDATE outbox SET sent = datetime('now') WHERE batch = ? AND sent IS NULL{rows}", (batch, *parameters)
+            )
+            conn.commit()
+            return 0
+        cursor.execute(f'''
+            UPDATE outbox SET attempts = attempts + ?, error = COALESCE(?, error),
+                failed = CASE WHEN attempts + ? >= ? THEN datetime('now') END
+            WHERE batch = ? AND sent IS NULL{rows}
+        ''', (attempts, error, attempts, max_attempts, batch, *parameters))
+        cursor.execute(
+            f'SELECT COUNT(*) FROM outbox WHERE batch = ? AND sent IS NULL AND failed IS NOT NULL{rows}',
+            (batch, *parameters),
+        )
+        given_up = cursor.fetchone()[0]
+        cursor.execute(
+            f'UPDATE outbox SET batch = NULL, claimed = NULL WHERE batch = ? AND sent IS NULL AND failed IS NULL{rows}',
+            (batch, *parameters),
+        )
+        conn.commit()
+        return given_up
+
+def write_event(name: str, type: str, message: str, timestamp: str, process: int, keep: int = 1000) -> None:
+    """
+    Record a trader event so that other processes can pick it up, keeping only the latest `keep` events.
+    """
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO events (name, type, message, timestamp, process)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name.lower(), type, message, timestamp, process))
+        cursor.execute('DELETE FROM events WHERE id <= ?', (cursor.lastrowid - keep,))
+        conn.commit()
+
+def read_events(after: int) -> list[tuple[int, str, str, str, str, int]]:
+    """
+    Read the events recorded since the event with id `after`.
+
+    Returns:
+        list: A list of tuples containing (id, name, type, message, timestamp, process), oldest first
+    """
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT id, name, type, message, timestamp, process FROM events WHERE id > ? ORDER BY id', (after,)
+        )
+        return cursor.fetchall()
+
+def read_recent_events(name: str, last_n: int = 20) -> list[tuple[str, str, str]]:
+    """
+    Read the most recent events for a given name, from any process.
+
+    Returns:
+        list: A list of tuples containing (type, message, timestamp), oldest first
+    """
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT type, message, timestamp FROM events
+            WHERE name = ?
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (name.lower(), last_n))
+        return list(reversed(cursor.fetchall()))
+
+def last_event_id() -> int:
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM events')
+        return cursor.fetchone()[0]
+
+def read_all_accounts() -> list[tuple[str, str]]:
+    """
+    Read every account as stored, without parsing.
+
+    Returns:
+        list: A list of tuples containing (name, account json)
+    """
+    with sqlite3.connect(DB) as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT name, account FROM accounts ORDER BY name')
+        return cursor.fetchall()
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from pydantic import BaseModel
+from database import write_event, read_events, read_recent_events, last_event_id
+
+RECENT_EVENTS = 20
+MAX_QUEUED_EVENTS = 1000
+EVENT_POLL_SECONDS = float(os.getenv("EVENT_POLL_SECONDS", "1"))
+
+
+class Event(BaseModel):
+    trader: str
+    type: str
+    message: str
+    timestamp: str
+
+    def __repr__(self):
+        return f"{self.timestamp} [{self.type}] {self.message}"
+
+
+class EventBus:
+    """
+    Delivers trader activity to subscribers as it happens.
+    Subscribers get an asyncio queue on their own event loop, filled with call_soon_threadsafe, so waiting for
+    events doesn't hold a worker thread while traders publish from another loop or thread.
+    Every event is also recorded in the database, and `follow` relays the events published by other processes,
+    so a dashboard sees a trading floor that runs separately. A subscriber that falls behind loses events rather
+    than holding up the traders.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self.following = False
+
+    def publish(self, trader: str, type: str, message: str) -> Event:
+        event = Event(
+            trader=trader.lower(),
+            type=type,
+            message=message,
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        write_event(event.trader, event.type, event.message, event.timestamp, os.getpid())
+        self.deliver(event)
+        return event
+
+    def deliver(self, event: Event) -> None:
+        with self.lock:
+            subscribers = list(self.subscribers.get(event.trader, []))
+        for loop, events in subscribers:
+            try:
+                loop.call_soon_threadsafe(self.put, events, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                pass
+
+    @staticmethod
+    def put(events: asyncio.Queue, event: Event) -> None:
+        try:
+            events.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    def subscribe(self, trader: str) -> asyncio.Queue:
+        """Called on the subscriber's event loop, which the queue belongs to"""
+        events = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+        with self.lock:
+            self.subscribers.setdefault(trader.lower(), []).append((asyncio.get_running_loop(), events))
+        return events
+
+    def unsubscribe(self, trader: str, events: asyncio.Queue) -> None:
+        with self.lock:
+            subscribers = self.subscribers.get(trader.lower(), [])
+            subscribers[:] = [subscriber for subscriber in subscribers if subscriber[1] is not events]
+
+    def recent_events(self, trader: str) -> list[Event]:
+        return [
+            Event(trader=trader.lower(), type=type, message=message, timestamp=timestamp)
+            for type, message, timestamp in read_recent_events(trader, RECENT_EVENTS)
+        ]
+
+    def follow(self) -> None:
+        """Relay events that other processes publish to this process's subscribers, in a daemon thread"""
+        with self.lock:
+            if self.following:
+                return
+            self.following = True
+        threading.Thread(target=self.relay, daemon=True).start()
+
+    def relay(self) -> None:
+        after = last_event_id()
+        while True:
+            time.sleep(EVENT_POLL_SECONDS)
+            try:
+                rows = read_events(after)
+            except Exception as e:
+                print(f"Could not read trader events: {e}")
+                continue
+            for id, trader, type, message, timestamp, process in rows:
+                after = id
+                if process != os.getpid():
+                    self.deliver(Event(trader=trader, type=type, message=message, timestamp=timestamp))
+
+
+bus = EventBus()
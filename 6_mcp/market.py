@@ -3,9 +3,11 @@ from dotenv import load_dotenv
 import os
 from datetime import datetime
 import random
+import time
 from database import write_market, read_market
+from price_store import PriceStore
 from functools import lru_cache
-from datetime import timezone
+from datetime import timezone, timedelta
 
 load_dotenv(override=True)
 
@@ -15,6 +17,11 @@ polygon_plan = os.getenv("POLYGON_PLAN")
 is_paid_polygon = polygon_plan == "paid"
 is_realtime_polygon = polygon_plan == "realtime"
 
+# The free plan allows 5 requests a minute
+FREE_PLAN_PAUSE_SECONDS = 12.0
+
+price_store = PriceStore()
+
 
 def is_market_open() -> bool:
     client = RESTClient(polygon_api_key)
@@ -30,9 +37,31 @@ def get_all_share_prices_polygon_eod() -> dict[str, float]:
     last_close = datetime.fromtimestamp(probe.timestamp / 1000, tz=timezone.utc).date()
 
     results = client.get_grouped_daily_aggs(last_close, adjusted=True, include_otc=False)
+    price_store.ingest_aggs(last_close.isoformat(), results)
     return {result.ticker: result.close for result in results}
 
 
+def backfill_price_store(days: int = 30, pause: float | None = None) -> int:
+    """
+    Fetch grouped daily bars for each of the last N weekdays that isn't already in the price store,
+    pausing between requests to stay within the plan's rate limit
+    """
+    if pause is None:
+        pause = 0.0 if is_paid_polygon or is_realtime_polygon else FREE_PLAN_PAUSE_SECONDS
+    client = RESTClient(polygon_api_key)
+    today = datetime.now(timezone.utc).date()
+    fetched = 0
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        if day.weekday() < 5 and not price_store.has(day.isoformat()):
+            if fetched:
+                time.sleep(pause)
+            results = client.get_grouped_daily_aggs(day, adjusted=True, include_otc=False)
+            price_store.ingest_aggs(day.isoformat(), results)
+            fetched += 1
+    return fetched
+
+
 @lru_cache(maxsize=2)
 def get_market_for_prior_date(today):
     market_data = read_market(today)
@@ -1,8 +1,30 @@
+import math
+import numpy as np
 from mcp.server.fastmcp import FastMCP
-from market import get_share_price
+from market import get_share_price, price_store
 
 mcp = FastMCP("market_server")
 
+
+def require_positive(**values: int) -> None:
+    for name, value in values.items():
+        if value < 1:
+            raise ValueError(f"{name} must be at least 1, got {value}")
+
+
+def recent_start(days: int) -> str | None:
+    require_positive(days=days)
+    dates = price_store.dates()
+    return dates[-days] if len(dates) >= days else (dates[0] if dates else None)
+
+
+def by_date(dates, values) -> dict[str, float | None]:
+    return {
+        date: None if math.isnan(value) else round(value, 4)
+        for date, value in zip(dates.tolist(), values.tolist())
+    }
+
+
 @mcp.tool()
 async def lookup_share_price(symbol: str) -> float:
     """This tool provides the current price of the given stock symbol.
@@ -12,5 +34,53 @@ async def lookup_share_price(symbol: str) -> float:
     """
     return get_share_price(symbol)
 
+
+@mcp.tool()
+async def get_price_history(symbol: str, days: int = 30) -> dict[str, float | None]:
+    """This tool provides the daily closing prices of the given stock symbol over recent trading days.
+
+    Args:
+        symbol: the symbol of the stock
+        days: the number of most recent trading days to return
+    """
+    require_positive(days=days)
+    dates, closes = price_store.history([symbol], recent_start(days))
+    return by_date(dates, closes[:, 0])
+
+
+@mcp.tool()
+async def get_returns(symbol: str, days: int = 30) -> dict:
+    """This tool provides the daily returns of the given stock symbol over recent trading days,
+    with the total return and daily volatility over the period.
+
+    Args:
+        symbol: the symbol of the stock
+        days: the number of most recent trading days to cover
+    """
+    require_positive(days=days)
+    dates, returns = price_store.returns([symbol], recent_start(days + 1))
+    daily = returns[:, 0]
+    valid = daily[~np.isnan(daily)]
+    return {
+        "daily_returns": by_date(dates, daily),
+        "total_return": round(float((1 + valid).prod() - 1), 4) if len(valid) else None,
+        "volatility": round(float(valid.std()), 4) if len(valid) > 1 else None,
+    }
+
+
+@mcp.tool()
+async def get_moving_average(symbol: str, window: int = 20, days: int = 30) -> dict[str, float | None]:
+    """This tool provides the simple moving average of the closing price of the given stock symbol.
+
+    Args:
+        symbol: the symbol of the stock
+        window: the number of trading days in the moving average
+        days: the number of most recent trading days to return
+    """
+    require_positive(window=window, days=days)
+    dates, averages = price_store.moving_average([symbol], window, recent_start(days + window - 1))
+    return by_date(dates[-days:], averages[-days:, 0])
+
+
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    mcp.run(transport='stdio')
@@ -27,6 +27,22 @@ trader_mcp_server_params = [
     market_mcp,
 ]
 
+# The knowledge-graph memory shared by all traders, in memory/memory.db
+# On its own, each researcher starts a memory server over stdio. The trading floor starts one memory server for
+# all its traders and points them at it by setting MEMORY_MCP_URL (default http://localhost:8765/sse);
+# set MEMORY_MCP_URL=stdio to keep one per researcher there too
+
+DEFAULT_MEMORY_MCP_URL = "http://localhost:8765/sse"
+
+
+def memory_mcp_params():
+    """Read when the researcher's servers are made, so traders see the URL the trading floor set at startup"""
+    memory_mcp_url = os.getenv("MEMORY_MCP_URL")
+    if memory_mcp_url and memory_mcp_url != "stdio":
+        return {"url": memory_mcp_url}
+    return {"command": "uv", "args": ["run", "memory_server.py"]}
+
+
 # The full set of MCP servers for the researcher: Fetch, Brave Search and Memory
 
 
@@ -38,9 +54,5 @@ def researcher_mcp_server_params(name: str):
             "args": ["-y", "@modelcontextprotocol/server-brave-search"],
             "env": brave_env,
         },
-        {
-            "command": "npx",
-            "args": ["-y", "mcp-memory-libsql"],
-            "env": {"LIBSQL_URL": f"file:./memory/{name}.db"},
-        },
+        memory_mcp_params(),
     ]
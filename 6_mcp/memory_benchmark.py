@@ -0,0 +1,86 @@
+"""
+Compare the in-repo memory_server.py with the npx mcp-memory-libsql server:
+startup time (spawn, initialize, list tools) and search_nodes latency over a seeded graph.
+
+Run with: uv run memory_benchmark.py
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import mcp
+from mcp import StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+STARTS = 3
+ENTITIES = 500
+LOOKUPS = 200
+
+
+def server_params(directory: str) -> dict[str, StdioServerParameters]:
+    env = {**os.environ}
+    return {
+        "memory_server.py": StdioServerParameters(
+            command="uv",
+            args=["run", "memory_server.py"],
+            env={**env, "MEMORY_DB": os.path.join(directory, "python.db")},
+        ),
+        "mcp-memory-libsql": StdioServerParameters(
+            command="npx",
+            args=["-y", "mcp-memory-libsql"],
+            env={**env, "LIBSQL_URL": f"file:{os.path.join(directory, 'libsql.db')}"},
+        ),
+    }
+
+
+def entities(count: int) -> list[dict]:
+    return [
+        {
+            "name": f"TICK{i}",
+            "entityType": "company" if i % 2 else "website",
+            "observations": [f"Ticker {i} reported earnings", f"Sector {i % 11} exposure"],
+        }
+        for i in range(count)
+    ]
+
+
+async def time_startup(params: StdioServerParameters) -> float:
+    start = time.perf_counter()
+    async with stdio_client(params) as streams:
+        async with mcp.ClientSession(*streams) as session:
+            await session.initialize()
+            await session.list_tools()
+            return time.perf_counter() - start
+
+
+async def time_lookups(params: StdioServerParameters) -> list[float]:
+    async with stdio_client(params) as streams:
+        async with mcp.ClientSession(*streams) as session:
+            await session.initialize()
+            await session.call_tool("create_entities", {"entities": entities(ENTITIES)})
+            timings = []
+            for i in range(LOOKUPS):
+                start = time.perf_counter()
+                await session.call_tool("search_nodes", {"query": f"TICK{i % ENTITIES}"})
+                timings.append(time.perf_counter() - start)
+            return timings
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for name, params in server_params(directory).items():
+            startups = [await time_startup(params) for _ in range(STARTS)]
+            lookups = sorted(await time_lookups(params))
+            p95 = lookups[int(len(lookups) * 0.95) - 1]
+            print(f"{name}")
+            print(f"  startup: median {statistics.median(startups):.2f}s over {STARTS} starts")
+            print(
+                f"  search_nodes: median {statistics.median(lookups) * 1000:.1f}ms, "
+                f"p95 {p95 * 1000:.1f}ms over {LOOKUPS} lookups of {ENTITIES} entities"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+import os
+import sys
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from mcp.server.fastmcp import FastMCP
+from memory_store import KnowledgeGraph
+
+load_dotenv(override=True)
+
+# Served over SSE on the port in MEMORY_MCP_URL, where the traders expect it
+memory_mcp_url = urlparse(os.getenv("MEMORY_MCP_URL") or "http://localhost:8765/sse")
+
+mcp = FastMCP("memory_server", port=memory_mcp_url.port or 8765)
+graph = KnowledgeGraph()
+
+
+class Entity(BaseModel):
+    name: str = Field(description="The unique name of the entity")
+    entityType: str = Field(description="The type of the entity, e.g. company, person, website")
+    observations: list[str] = Field(default=[], description="Facts observed about the entity")
+
+
+class Relation(BaseModel):
+    source: str = Field(alias="from", description="The name of the source entity")
+    target: str = Field(alias="to", description="The name of the target entity")
+    relationType: str = Field(description="The relationship, in active voice")
+
+
+class Observation(BaseModel):
+    entityName: str = Field(description="The name of the entity to add observations to")
+    contents: list[str] = Field(description="The observations to add")
+
+
+@mcp.tool()
+async def create_entities(entities: list[Entity]) -> str:
+    """Create new entities, or add observations to existing ones, in the shared knowledge graph.
+
+    Args:
+        entities: The entities to create
+    """
+    names = graph.create_entities([entity.model_dump() for entity in entities])
+    return f"Created or updated {len(names)} entities"
+
+
+@mcp.tool()
+async def create_relations(relations: list[Relation]) -> str:
+    """Create relations between existing entities in the knowledge graph.
+
+    Args:
+        relations: The relations to create
+    """
+    count = graph.create_relations([relation.model_dump(by_alias=True) for relation in relations])
+    return f"Created {count} relations"
+
+
+@mcp.tool()
+async def add_observations(observations: list[Observation]) -> str:
+    """Add observations to existing entities in the knowledge graph.
+
+    Args:
+        observations: The observations to add, grouped by entity
+    """
+    names = graph.add_observations([observation.model_dump() for observation in observations])
+    return f"Added observations to {len(names)} entities"
+
+
+@mcp.tool()
+async def search_nodes(query: str) -> dict:
+    """Search the knowledge graph for entities by name, type or the content of their observations.
+
+    Args:
+        query: The text to search for
+    """
+    return graph.search_nodes(query)
+
+
+@mcp.tool()
+async def open_nodes(names: list[str]) -> dict:
+    """Retrieve specific entities by name, with their observations and relations.
+
+    Args:
+        names: The names of the entities to retrieve
+    """
+    return graph.open_nodes(names)
+
+
+@mcp.tool()
+async def read_graph() -> dict:
+    """Read the most recent entities in the knowledge graph, with their relations."""
+    return graph.read_graph()
+
+
+@mcp.tool()
+async def delete_entity(name: str) -> str:
+    """Delete an entity and all of its observations and relations.
+
+    Args:
+        name: The name of the entity to delete
+    """
+    if graph.delete_entity(name):
+        return f"Deleted entity {name}"
+    return f"Entity {name} not found"
+
+
+@mcp.tool()
+async def delete_relation(source: str, target: str, relationType: str) -> str:
+    """Delete a relation between two entities.
+
+    Args:
+        source: The name of the source entity
+        target: The name of the target entity
+        relationType: The type of the relation
+    """
+    if graph.delete_relation(source, target, relationType):
+        return f"Deleted relation {source} {relationType} {target}"
+    return "Relation not found"
+
+
+@mcp.tool()
+async def delete_observations(entityName: str, observations: list[str]) -> str:
+    """Delete specific observations from an entity.
+
+    Args:
+        entityName: The name of the entity
+        observations: The observations to delete
+    """
+    count = graph.delete_observations(entityName, observations)
+    return f"Deleted {count} observations"
+
+
+if __name__ == "__main__":
+    transport = sys.argv[1] if len(sys.argv) > 1 else "stdio"
+    mcp.run(transport=transport)
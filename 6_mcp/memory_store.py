@@ -0,0 +1,220 @@
+import sqlite3
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+MEMORY_DB = os.getenv("MEMORY_DB", "memory/memory.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    entity_type TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_entities_type ON entities(entity_type);
+
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity_id INTEGER NOT NULL REFERENCES entities(id) ON DELETE CASCADE,
+    content TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(entity_id, content)
+);
+CREATE INDEX IF NOT EXISTS idx_observations_entity ON observations(entity_id);
+
+CREATE TABLE IF NOT EXISTS relations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL REFERENCES entities(name) ON DELETE CASCADE,
+    target TEXT NOT NULL REFERENCES entities(name) ON DELETE CASCADE,
+    relation_type TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(source, target, relation_type)
+);
+CREATE INDEX IF NOT EXISTS idx_relations_source ON relations(source);
+CREATE INDEX IF NOT EXISTS idx_relations_target ON relations(target);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS observations_fts USING fts5(
+    content, content='observations', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS observations_ai AFTER INSERT ON observations BEGIN
+    INSERT INTO observations_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS observations_ad AFTER DELETE ON observations BEGIN
+    INSERT INTO observations_fts(observations_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching any word as a prefix, ignoring FTS syntax."""
+    words = re.findall(r"\w+", query)
+    return " OR ".join(f'"{word}"*' for word in words)
+
+
+class KnowledgeGraph:
+    """
+    A knowledge graph of entities, relations and observations in a single SQLite database.
+    One instance holds one connection; all writes for a tool call happen in one transaction.
+    """
+
+    def __init__(self, path: str = MEMORY_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def create_entities(self, entities: list[dict]) -> list[str]:
+        """Create or update entities; observations are appended, duplicates ignored."""
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO entities (name, entity_type) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET entity_type=excluded.entity_type
+                """,
+                [(entity["name"], entity["entityType"]) for entity in entities],
+            )
+            self._insert_observations(
+                [(entity["name"], o) for entity in entities for o in entity.get("observations", [])]
+            )
+        return [entity["name"] for entity in entities]
+
+    def add_observations(self, observations: list[dict]) -> list[str]:
+        with self.conn:
+            missing = self._missing([item["entityName"] for item in observations])
+            if missing:
+                raise ValueError(f"Unknown entities: {', '.join(missing)}")
+            self._insert_observations(
+                [(item["entityName"], o) for item in observations for o in item["contents"]]
+            )
+        return [item["entityName"] for item in observations]
+
+    def create_relations(self, relations: list[dict]) -> int:
+        with self.conn:
+            names = [r["from"] for r in relations] + [r["to"] for r in relations]
+            missing = self._missing(names)
+            if missing:
+                raise ValueError(f"Unknown entities: {', '.join(missing)}")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO relations (source, target, relation_type) VALUES (?, ?, ?)",
+                [(r["from"], r["to"], r["relationType"]) for r in relations],
+            )
+        return len(relations)
+
+    def delete_entity(self, name: str) -> bool:
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM entities WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def delete_relation(self, source: str, target: str, relation_type: str) -> bool:
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM relations WHERE source = ? AND target = ? AND relation_type = ?",
+                (source, target, relation_type),
+            )
+        return cursor.rowcount > 0
+
+    def delete_observations(self, name: str, contents: list[str]) -> int:
+        with self.conn:
+            cursor = self.conn.executemany(
+                """
+                DELETE FROM observations
+                WHERE entity_id = (SELECT id FROM entities WHERE name = ?) AND content = ?
+                """,
+                [(name, content) for content in contents],
+            )
+        return cursor.rowcount
+
+    def search_nodes(self, query: str, limit: int = 20) -> dict:
+        """Find entities by name, type or full-text match on their observations."""
+        like = f"%{query}%"
+        match = fts_query(query)
+        rows = self.conn.execute(
+            """
+            SELECT name FROM entities WHERE name LIKE ? OR entity_type LIKE ?
+            UNION
+            SELECT e.name FROM observations_fts f
+            JOIN observations o ON o.id = f.rowid
+            JOIN entities e ON e.id = o.entity_id
+            WHERE f.content MATCH ?
+            LIMIT ?
+            """,
+            (like, like, match or '""', limit),
+        ).fetchall()
+        return self.open_nodes([row[0] for row in rows])
+
+    def open_nodes(self, names: list[str]) -> dict:
+        if not names:
+            return {"entities": [], "relations": []}
+        marks = ",".join("?" * len(names))
+        rows = self.conn.execute(
+            f"""
+            SELECT e.name, e.entity_type, o.content FROM entities e
+            LEFT JOIN observations o ON o.entity_id = e.id
+            WHERE e.name IN ({marks})
+            ORDER BY e.id, o.id
+            """,
+            names,
+        ).fetchall()
+        relations = self.conn.execute(
+            f"""
+            SELECT source, target, relation_type FROM relations
+            WHERE source IN ({marks}) OR target IN ({marks})
+            """,
+            names + names,
+        ).fetchall()
+        return {"entities": self._entities(rows), "relations": self._relations(relations)}
+
+    def read_graph(self, limit: int = 100) -> dict:
+        """Return the most recently created entities and the relations between them."""
+        names = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT name FROM entities ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        ]
+        return self.open_nodes(names)
+
+    def _insert_observations(self, pairs: list[tuple[str, str]]):
+        self.conn.executemany(
+            """
+            INSERT OR IGNORE INTO observations (entity_id, content)
+            SELECT id, ? FROM entities WHERE name = ?
+            """,
+            [(content, name) for name, content in pairs],
+        )
+
+    def _missing(self, names: list[str]) -> list[str]:
+        unique = list(dict.fromkeys(names))
+        marks = ",".join("?" * len(unique))
+        found = {
+            row[0]
+            for row in self.conn.execute(
+                f"SELECT name FROM entities WHERE name IN ({marks})", unique
+            ).fetchall()
+        }
+        return [name for name in unique if name not in found]
+
+    @staticmethod
+    def _entities(rows) -> list[dict]:
+        entities = {}
+        for name, entity_type, content in rows:
+            entity = entities.setdefault(
+                name, {"name": name, "entityType": entity_type, "observations": []}
+            )
+            if content is not None:
+                entity["observations"].append(content)
+        return list(entities.values())
+
+    @staticmethod
+    def _relations(rows) -> list[dict]:
+        return [{"from": s, "to": t, "relationType": r} for s, t, r in rows]
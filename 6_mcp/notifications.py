@@ -0,0 +1,202 @@
+import os
+import asyncio
+import uuid
+import httpx
+from dotenv import load_dotenv
+from database import write_outbox, claim_outbox, complete_outbox
+
+load_dotenv(override=True)
+
+pushover_user = os.getenv("PUSHOVER_USER")
+pushover_token = os.getenv("PUSHOVER_TOKEN")
+pushover_url = "https://api.pushover.net/1/messages.json"
+
+NOTIFICATION_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_WINDOW_SECONDS", "30"))
+MAX_ATTEMPTS = 3
+# Delivery attempts across flushes before a notification is given up on
+MAX_DELIVERY_ATTEMPTS = int(os.getenv("MAX_NOTIFICATION_ATTEMPTS", "10"))
+PUSHOVER_MAX_LENGTH = 1024
+
+
+class PushoverSink:
+    """Delivers notifications to Pushover over a pooled HTTP client, opened on first use"""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.client = None
+
+    async def send(self, message: str) -> None:
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=self.timeout)
+        payload = {"user": pushover_user, "token": pushover_token, "message": message}
+        response = await self.client.post(pushover_url, data=payload)
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class ConsoleSink:
+    """Prints notifications; used when Pushover isn't configured"""
+
+    async def send(self, message: str) -> None:
+        print(f"Push: {message}")
+
+
+class MemorySink:
+    """Keeps notifications in a list, for tests"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, message: str) -> None:
+        self.messages.append(message)
+
+
+def default_sink():
+    if pushover_user and pushover_token:
+        return PushoverSink()
+    return ConsoleSink()
+
+
+def split_message(message: str, limit: int = PUSHOVER_MAX_LENGTH) -> list[str]:
+    """A message too long for one notification, as numbered parts that each fit"""
+    if len(message) <= limit:
+        return [message]
+    size = limit - len(" (99/99)")
+    parts = [message[i : i + size] for i in range(0, len(message), size)]
+    return [f"{part} ({n}/{len(parts)})" for n, part in enumerate(parts, 1)]
+
+
+def digest_text(lines: list[str], senders: list[str]) -> str:
+    if len(lines) == 1:
+        return lines[0]
+    return f"{len(lines)} updates" + (f" from {', '.join(senders)}" if senders else "") + "\n" + "\n".join(lines)
+
+
+def make_digests(rows: list[tuple[int, str, str]], limit: int = PUSHOVER_MAX_LENGTH) -> list[tuple[list[int], list[str]]]:
+    """
+    Combine queued notifications into as few messages of at most `limit` characters as they fit in, dropping repeats,
+    with each one headed by who sent it. A notification too long for one message is split into numbered parts.
+
+    Returns:
+        list: (the ids of the notifications, the messages to send for them), in the order they were queued
+    """
+    lines: dict[str, tuple[list[int], str]] = {}
+    for id, name, message in rows:
+        line = f"{name.title()}: {message}" if name else message
+        lines.setdefault(line, ([], name.title() if name else ""))[0].append(id)
+    digests = []
+    ids, chunk, senders = [], [], []
+    for line, (line_ids, sender) in lines.items():
+        candidate = chunk + [line]
+        candidate_senders = senders + [sender] if sender and sender not in senders else senders
+        if chunk and len(digest_text(candidate, candidate_senders)) > limit:
+            digests.append((ids, [digest_text(chunk, senders)]))
+            ids, chunk, senders = [], [], []
+            candidate, candidate_senders = [line], [sender] if sender else []
+        if len(line) > limit:
+            digests.append((line_ids, split_message(line, limit)))
+            continue
+        ids, chunk, senders = ids + line_ids, candidate, candidate_senders
+    if chunk:
+        digests.append((ids, [digest_text(chunk, senders)]))
+    return digests
+
+
+def is_permanent(error: Exception) -> bool:
+    """A client error other than rate limiting will fail the same way every time, so it isn't retried"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return 400 <= status < 500 and status != 429
+    return False
+
+
+class NotificationDispatcher:
+    """
+    Queues notifications in the outbox table and delivers them in the background.
+    Everything queued within one window is sent as one digest, or as few as fit Pushover's length limit;
+    anything that can't be delivered stays in the outbox and goes out with the next flush, even after a restart.
+    A notification is given up on after max_attempts failed deliveries, or at once if it is rejected
+    with a client error other than 429.
+    With window=None nothing is flushed in the background, for short-lived processes like the push server
+    that only queue, and leave delivery to the trading floor's flushes.
+    """
+
+    def __init__(
+        self, sink=None, window: float | None = NOTIFICATION_WINDOW_SECONDS, max_attempts: int = MAX_DELIVERY_ATTEMPTS
+    ):
+        self.sink = sink or default_sink()
+        self.window = window
+        self.max_attempts = max_attempts
+        self.pending_flush = None
+
+    async def enqueue(self, name: str, message: str) -> bool:
+        """Queue a message and return immediately; returns False if it was a duplicate"""
+        queued = await asyncio.to_thread(write_outbox, name, message)
+        if self.window is not None and (not self.pending_flush or self.pending_flush.done()):
+            self.pending_flush = asyncio.create_task(self.flush_after(self.window))
+        return queued
+
+    async def flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def deliver(self, messages: list[str]) -> tuple[int, bool, str | None]:
+        """
+        Send the messages in order, retrying the one that fails.
+
+        Returns:
+            tuple: (failed attempts, whether the failure is permanent, the last error), with no error if all were sent
+        """
+        attempts, sent = 0, 0
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                while sent < len(messages):
+                    await self.sink.send(messages[sent])
+                    sent += 1
+                return attempts, False, None
+            except Exception as e:
+                attempts += 1
+                print(f"Notification delivery attempt {attempt + 1} failed: {e}")
+                error, permanent = f"{type(e).__name__}: {e}", is_permanent(e)
+                if permanent:
+                    break
+                if attempt < MAX_ATTEMPTS - 1:
+                    await asyncio.sleep(2**attempt)
+        return attempts, permanent, error
+
+    async def flush(self) -> int:
+        """
+        Send everything in the outbox, as few digests as fit Pushover's length limit; returns the number of
+        notifications delivered. A digest's notifications are marked sent only once it is delivered; if one fails,
+        the rest stay queued for the next flush.
+        """
+        batch = uuid.uuid4().hex
+        rows = await asyncio.to_thread(claim_outbox, batch)
+        if not rows:
+            return 0
+        delivered = 0
+        for ids, messages in make_digests(rows):
+            attempts, permanent, error = await self.deliver(messages)
+            if error is None:
+                await asyncio.to_thread(complete_outbox, batch, True, ids=ids)
+                delivered += len(ids)
+                continue
+            max_attempts = 0 if permanent else self.max_attempts
+            given_up = await asyncio.to_thread(complete_outbox, batch, False, attempts, max_attempts, error, ids)
+            if given_up:
+                print(f"Gave up on {given_up} notifications: {error}")
+            break
+        # Release whatever wasn't sent without counting an attempt against it
+        await asyncio.to_thread(complete_outbox, batch, False, 0, self.max_attempts)
+        return delivered
+
+    async def close(self) -> None:
+        """Stop the background flush, and close the sink's connections"""
+        if self.pending_flush and not self.pending_flush.done():
+            self.pending_flush.cancel()
+        if hasattr(self.sink, "aclose"):
+            await self.sink.aclose()
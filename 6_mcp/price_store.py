@@ -0,0 +1,176 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "prices")
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class PriceStore:
+    """
+    Daily OHLCV bars stored column by column in NumPy arrays, one .npz partition per trading date.
+    Each partition holds a sorted array of tickers and one float array per field, so a symbol lookup
+    is a binary search and a cross-section is a single array read.
+    """
+
+    def __init__(self, directory: str = PRICE_STORE_DIR):
+        self.directory = directory
+        self.partitions = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, date: str) -> str:
+        return os.path.join(self.directory, f"{date}.npz")
+
+    def dates(self, start: str | None = None, end: str | None = None) -> list[str]:
+        """The stored dates between start and end inclusive, oldest first"""
+        dates = sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith(".npz"))
+        return [d for d in dates if (not start or d >= start) and (not end or d <= end)]
+
+    def has(self, date: str) -> bool:
+        return os.path.exists(self.path(date))
+
+    def write_day(self, date: str, tickers, **fields) -> None:
+        """Write one date's bars; fields are arrays aligned with tickers, keyed by FIELDS"""
+        tickers = np.asarray(tickers, dtype=str)
+        order = np.argsort(tickers)
+        arrays = {"tickers": tickers[order]}
+        for field in FIELDS:
+            arrays[field] = np.asarray(fields[field], dtype=np.float64).reshape(-1)[order]
+        temp = self.path(date) + ".tmp"
+        with open(temp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp, self.path(date))
+        self.partitions.pop(date, None)
+
+    def ingest_aggs(self, date: str, aggs) -> int:
+        """Store the results of a Polygon grouped-daily request; returns the number of tickers"""
+        aggs = [agg for agg in aggs if agg.ticker and agg.close is not None]
+        self.write_day(
+            date,
+            [agg.ticker for agg in aggs],
+            **{field: [getattr(agg, field) for agg in aggs] for field in FIELDS},
+        )
+        return len(aggs)
+
+    def read_day(self, date: str) -> dict[str, np.ndarray]:
+        if date not in self.partitions:
+            with np.load(self.path(date)) as data:
+                self.partitions[date] = {key: data[key] for key in data.files}
+        return self.partitions[date]
+
+    def cross_section(self, date: str, field: str = "close") -> dict[str, float]:
+        """Every ticker's value of a field on one date"""
+        day = self.read_day(date)
+        return dict(zip(day["tickers"].tolist(), day[field].tolist()))
+
+    def history(
+        self, symbols: list[str], start: str | None = None, end: str | None = None, field: str = "close"
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        A field for the given symbols over a date range.
+
+        Returns:
+            tuple: (dates, values) where values has one row per date and one column per symbol,
+            with NaN where a symbol didn't trade; dates with no trading at all are skipped
+        """
+        dates = [date for date in self.dates(start, end) if len(self.read_day(date)["tickers"])]
+        symbols = np.asarray(symbols, dtype=str)
+        values = np.full((len(dates), len(symbols)), np.nan)
+        for row, date in enumerate(dates):
+            day = self.read_day(date)
+            tickers = day["tickers"]
+            index = np.searchsorted(tickers, symbols).clip(max=len(tickers) - 1)
+            found = tickers[index] == symbols
+            values[row, found] = day[field][index[found]]
+        return np.asarray(dates), values
+
+    def returns(
+        self, symbols: list[str], start: str | None = None, end: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Daily simple returns of the closing price; the first date in the range has no return"""
+        dates, closes = self.history(symbols, start, end)
+        return dates[1:], closes[1:] / closes[:-1] - 1.0
+
+    def moving_average(
+        self, symbols: list[str], window: int, start: str | None = None, end: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Simple moving average of the closing price; NaN until a full window is available"""
+        if window <= 0:
+            raise ValueError(f"The moving average window must be at least 1 day, not {window}")
+        dates, closes = self.history(symbols, start, end)
+        averages = np.full(closes.shape, np.nan)
+        if window <= len(dates):
+            sums = np.cumsum(np.vstack([np.zeros((1, closes.shape[1])), closes]), axis=0)
+            averages[window - 1 :] = (sums[window:] - sums[:-window]) / window
+        return dates, averages
+
+
+def write_synthetic(store: PriceStore, tickers: list[str], dates: list[str], seed: int = 42) -> None:
+    """Fill a store with random-walk bars, for trying out queries without market data"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), len(tickers))), axis=0))
+    for row, date in enumerate(dates):
+        spread = close[row] * 0.01
+        store.write_day(
+            date,
+            tickers,
+            open=close[row] - spread / 2,
+            high=close[row] + spread,
+            low=close[row] - spread,
+            close=close[row],
+            volume=rng.integers(1_000, 1_000_000, len(tickers)),
+        )
+
+
+def check_synthetic() -> None:
+    """Check the queries against values computed directly from a synthetic store"""
+    import tempfile
+    from datetime import date, timedelta
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = PriceStore(directory)
+        days = [(date(2024, 1, 1) + timedelta(days=i)).isoformat() for i in range(30)]
+        tickers = ["AAPL", "MSFT", "NVDA"]
+        write_synthetic(store, tickers, days)
+        # A day on which one symbol didn't trade, and a day with no trading at all
+        store.write_day("2024-01-31", ["AAPL", "NVDA"], **{field: [1.0, 2.0] for field in FIELDS})
+        store.write_day("2024-02-01", [], **{field: [] for field in FIELDS})
+
+        closes = np.array([[store.cross_section(day)[ticker] for ticker in tickers] for day in days])
+
+        dates, values = store.history(["NVDA", "AAPL", "XYZ"], days[5], days[9])
+        assert dates.tolist() == days[5:10]
+        assert np.allclose(values[:, :2], closes[5:10, [2, 0]])
+        assert np.isnan(values[:, 2]).all()
+
+        dates, values = store.history(tickers, "2024-01-30")
+        assert dates.tolist() == ["2024-01-30", "2024-01-31"]
+        assert np.isnan(values[1, 1]) and values[1, 0] == 1.0 and values[1, 2] == 2.0
+
+        dates, returns = store.returns(tickers, days[0], days[4])
+        assert dates.tolist() == days[1:5]
+        assert np.allclose(returns, closes[1:5] / closes[:4] - 1.0)
+
+        dates, averages = store.moving_average(tickers, 5, days[0], days[9])
+        assert dates.tolist() == days[:10]
+        assert np.isnan(averages[:4]).all()
+        for row in range(4, 10):
+            assert np.allclose(averages[row], closes[row - 4 : row + 1].mean(axis=0))
+        assert np.allclose(store.moving_average(tickers, 1, days[0], days[9])[1], closes[:10])
+        assert np.isnan(store.moving_average(tickers, 11, days[0], days[9])[1]).all()
+        for window in (0, -1):
+            try:
+                store.moving_average(tickers, window)
+                raise AssertionError(f"window={window} was accepted")
+            except ValueError:
+                pass
+
+        assert sorted(store.cross_section(days[-1])) == tickers
+        assert store.cross_section("2024-02-01") == {}
+
+
+if __name__ == "__main__":
+    check_synthetic()
+    print("Price store checks passed")
@@ -1,30 +1,27 @@
-import os
 from dotenv import load_dotenv
-import requests
 from pydantic import BaseModel, Field
 from mcp.server.fastmcp import FastMCP
+from notifications import NotificationDispatcher
 
 load_dotenv(override=True)
 
-pushover_user = os.getenv("PUSHOVER_USER")
-pushover_token = os.getenv("PUSHOVER_TOKEN")
-pushover_url = "https://api.pushover.net/1/messages.json"
-
 
 mcp = FastMCP("push_server")
+# This server lives only as long as one trader's run, so it only queues; the trading floor delivers the digests
+dispatcher = NotificationDispatcher(window=None)
 
 
 class PushModelArgs(BaseModel):
     message: str = Field(description="A brief message to push")
+    name: str = Field(default="", description="Your name, if you have an account")
 
 
 @mcp.tool()
-def push(args: PushModelArgs):
+async def push(args: PushModelArgs):
     """Send a push notification with this brief message"""
     print(f"Push: {args.message}")
-    payload = {"user": pushover_user, "token": pushover_token, "message": args.message}
-    requests.post(pushover_url, data=payload)
-    return "Push notification sent"
+    queued = await dispatcher.enqueue(args.name, args.message)
+    return "Push notification queued" if queued else "Push notification already queued"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+import asyncio
+import random
+from typing import Awaitable, Callable
+from database import write_log
+
+
+class ScheduleMetrics:
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.missed = 0
+
+    def __repr__(self):
+        return (
+            f"started={self.started} completed={self.completed} overruns={self.overruns} "
+            f"skipped={self.skipped} missed={self.missed}"
+        )
+
+
+class TraderSchedule:
+    """
+    Runs one trader on its own cadence. Each run is cancelled if it passes its deadline, and a slot
+    is skipped if the previous run is still going, so a slow trader never delays the others.
+
+    Metrics count runs that overran their deadline, slots skipped because a run was still going,
+    and slots missed because the event loop fell behind.
+    """
+
+    def __init__(
+        self,
+        trader,
+        interval: float,
+        deadline: float,
+        jitter: float = 0.0,
+        should_run: Callable[[], Awaitable[bool]] | None = None,
+    ):
+        self.trader = trader
+        self.interval = interval
+        self.deadline = deadline
+        self.jitter = jitter
+        self.should_run = should_run
+        self.metrics = ScheduleMetrics()
+        self.task = None
+
+    async def run_once(self):
+        self.metrics.started += 1
+        try:
+            await asyncio.wait_for(self.trader.run(), timeout=self.deadline)
+            self.metrics.completed += 1
+        except asyncio.TimeoutError:
+            self.metrics.overruns += 1
+            write_log(self.trader.name, "schedule", f"Cancelled run after {self.deadline:.0f}s deadline")
+
+    async def run_forever(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        next_slot = loop.time()
+        while True:
+            if self.task and not self.task.done():
+                self.metrics.skipped += 1
+                write_log(self.trader.name, "schedule", "Skipped slot; previous run still going")
+            elif not self.should_run or await self.should_run():
+                self.task = asyncio.create_task(self.run_once())
+            next_slot += self.interval
+            now = loop.time()
+            if now > next_slot:
+                behind = int((now - next_slot) // self.interval) + 1
+                self.metrics.missed += behind
+                next_slot += behind * self.interval
+            await asyncio.sleep(next_slot - now)
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
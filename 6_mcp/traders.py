@@ -1,12 +1,13 @@
 from contextlib import AsyncExitStack
 from accounts_client import read_accounts_resource, read_strategy_resource
 from tracers import make_trace_id
+from events import bus
 from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
 import json
-from agents.mcp import MCPServerStdio
+from agents.mcp import MCPServerStdio, MCPServerSse
 from templates import (
     researcher_instructions,
     trader_instructions,
@@ -29,6 +30,7 @@ GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
 MAX_TURNS = 30
+TRADE_TOOLS = {"buy_shares", "sell_shares"}
 
 openrouter_client = AsyncOpenAI(base_url=OPENROUTER_BASE_URL, api_key=openrouter_api_key)
 deepseek_client = AsyncOpenAI(base_url=DEEPSEEK_BASE_URL, api_key=deepseek_api_key)
@@ -64,6 +66,12 @@ async def get_researcher_tool(mcp_servers, model_name) -> Tool:
     return researcher.as_tool(tool_name="Researcher", tool_description=research_tool())
 
 
+def make_mcp_server(params):
+    if "url" in params:
+        return MCPServerSse(params, client_session_timeout_seconds=120)
+    return MCPServerStdio(params, client_session_timeout_seconds=120)
+
+
 class Trader:
     def __init__(self, name: str, lastname="Trader", model_name="gpt-4o-mini"):
         self.name = name
@@ -98,21 +106,43 @@ class Trader:
             if self.do_trade
             else rebalance_message(self.name, strategy, account)
         )
-        await Runner.run(self.agent, message, max_turns=MAX_TURNS)
+        result = Runner.run_streamed(self.agent, message, max_turns=MAX_TURNS)
+        await self.publish_events(result)
+
+    async def publish_events(self, result):
+        """Publish tool calls, trade fills and the final appraisal to the event bus as they stream in"""
+        tool_calls = {}
+        async for event in result.stream_events():
+            if event.type != "run_item_stream_event":
+                continue
+            item = event.item
+            if item.type == "tool_call_item":
+                tool_name = getattr(item.raw_item, "name", None) or "tool"
+                arguments = getattr(item.raw_item, "arguments", None) or "{}"
+                tool_calls[getattr(item.raw_item, "call_id", None)] = (tool_name, arguments)
+                bus.publish(self.name, "tool_call", f"Called {tool_name}")
+            elif item.type == "tool_call_output_item":
+                raw = item.raw_item
+                call_id = raw.get("call_id") if isinstance(raw, dict) else getattr(raw, "call_id", None)
+                tool_name, arguments = tool_calls.get(call_id, (None, "{}"))
+                if tool_name in TRADE_TOOLS and "Completed" in str(item.output):
+                    verb = "Bought" if tool_name == "buy_shares" else "Sold"
+                    try:
+                        args = json.loads(arguments)
+                        bus.publish(self.name, "trade", f"{verb} {args.get('quantity')} of {args.get('symbol')}")
+                    except (json.JSONDecodeError, AttributeError):
+                        bus.publish(self.name, "trade", f"{verb}: {arguments}")
+        bus.publish(self.name, "appraisal", str(result.final_output))
 
     async def run_with_mcp_servers(self):
         async with AsyncExitStack() as stack:
             trader_mcp_servers = [
-                await stack.enter_async_context(
-                    MCPServerStdio(params, client_session_timeout_seconds=120)
-                )
+                await stack.enter_async_context(make_mcp_server(params))
                 for params in trader_mcp_server_params
             ]
             async with AsyncExitStack() as stack:
                 researcher_mcp_servers = [
-                    await stack.enter_async_context(
-                        MCPServerStdio(params, client_session_timeout_seconds=120)
-                    )
+                    await stack.enter_async_context(make_mcp_server(params))
                     for params in researcher_mcp_server_params(self.name)
                 ]
                 await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
@@ -3,16 +3,24 @@ from typing import List
 import asyncio
 from tracers import LogTracer
 from agents import add_trace_processor
-from market import is_market_open
+from market import is_market_open, backfill_price_store, polygon_api_key
+from mcp_params import DEFAULT_MEMORY_MCP_URL
+from notifications import NotificationDispatcher, NOTIFICATION_WINDOW_SECONDS
+from scheduler import TraderSchedule
 from dotenv import load_dotenv
+import subprocess
 import os
+from urllib.parse import urlparse
 
 load_dotenv(override=True)
 
 RUN_EVERY_N_MINUTES = int(os.getenv("RUN_EVERY_N_MINUTES", "60"))
+TRADER_DEADLINE_MINUTES = int(os.getenv("TRADER_DEADLINE_MINUTES", str(RUN_EVERY_N_MINUTES)))
+START_JITTER_SECONDS = int(os.getenv("START_JITTER_SECONDS", "60"))
 RUN_EVEN_WHEN_MARKET_IS_CLOSED = (
     os.getenv("RUN_EVEN_WHEN_MARKET_IS_CLOSED", "false").strip().lower() == "true"
 )
+MEMORY_SERVER_START_SECONDS = 60
 USE_MANY_MODELS = os.getenv("USE_MANY_MODELS", "false").strip().lower() == "true"
 
 names = ["Warren", "George", "Ray", "Cathie"]
@@ -38,15 +46,101 @@ def create_traders() -> List[Trader]:
     return traders
 
 
+async def is_listening(host: str, port: int) -> bool:
+    try:
+        _, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return False
+    writer.close()
+    await writer.wait_closed()
+    return True
+
+
+async def start_memory_server(timeout: float = MEMORY_SERVER_START_SECONDS) -> subprocess.Popen | None:
+    """
+    Start one shared memory server for all traders at MEMORY_MCP_URL, and wait until it accepts connections.
+    MEMORY_MCP_URL is set for this process, so its traders connect to the server, and the server takes its port from it.
+    Returns None if the traders use their own memory servers, or one is already running at that address.
+    """
+    memory_mcp_url = os.getenv("MEMORY_MCP_URL") or DEFAULT_MEMORY_MCP_URL
+    if memory_mcp_url == "stdio":
+        return None
+    os.environ["MEMORY_MCP_URL"] = memory_mcp_url
+    url = urlparse(memory_mcp_url)
+    host, port = url.hostname or "localhost", url.port or 80
+    if await is_listening(host, port):
+        print(f"Using the memory server already running at {memory_mcp_url}")
+        return None
+    process = subprocess.Popen(["uv", "run", "memory_server.py", "sse"])
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await is_listening(host, port):
+        if process.poll() is not None:
+            raise RuntimeError(f"The memory server exited with code {process.returncode} before it was ready")
+        if asyncio.get_running_loop().time() > deadline:
+            process.terminate()
+            raise TimeoutError(f"The memory server was not ready at {memory_mcp_url} after {timeout:.0f}s")
+        await asyncio.sleep(0.25)
+    return process
+
+
+async def backfill_price_history():
+    """Fill the price store with recent daily bars, so the history tools have data from the first run"""
+    if not polygon_api_key:
+        return
+    try:
+        fetched = await asyncio.to_thread(backfill_price_store)
+        print(f"Backfilled {fetched} days of price history")
+    except Exception as e:
+        print(f"Was not able to backfill price history due to {e}")
+
+
+def trader_interval_minutes(name: str) -> int:
+    """Each trader can have its own cadence, e.g. RUN_EVERY_N_MINUTES_WARREN=120"""
+    return int(os.getenv(f"RUN_EVERY_N_MINUTES_{name.upper()}", str(RUN_EVERY_N_MINUTES)))
+
+
+async def should_run() -> bool:
+    if RUN_EVEN_WHEN_MARKET_IS_CLOSED or await asyncio.to_thread(is_market_open):
+        return True
+    print("Market is closed, skipping run")
+    return False
+
+
+async def flush_notifications(dispatcher: NotificationDispatcher):
+    """Deliver what the traders' push servers queued, one digest per window"""
+    while True:
+        await asyncio.sleep(NOTIFICATION_WINDOW_SECONDS)
+        await dispatcher.flush()
+
+
 async def run_every_n_minutes():
     add_trace_processor(LogTracer())
-    traders = create_traders()
-    while True:
-        if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
-            await asyncio.gather(*[trader.run() for trader in traders])
-        else:
-            print("Market is closed, skipping run")
-        await asyncio.sleep(RUN_EVERY_N_MINUTES * 60)
+    schedules = [
+        TraderSchedule(
+            trader,
+            interval=trader_interval_minutes(trader.name) * 60,
+            deadline=TRADER_DEADLINE_MINUTES * 60,
+            jitter=START_JITTER_SECONDS,
+            should_run=should_run,
+        )
+        for trader in create_traders()
+    ]
+    memory_server = await start_memory_server()
+    dispatcher = NotificationDispatcher()
+    try:
+        await asyncio.gather(
+            backfill_price_history(),
+            flush_notifications(dispatcher),
+            *[schedule.run_forever() for schedule in schedules],
+        )
+    finally:
+        for schedule in schedules:
+            await schedule.stop()
+            print(f"{schedule.trader.name}: {schedule.metrics}")
+        await dispatcher.flush()
+        await dispatcher.close()
+        if memory_server:
+            memory_server.terminate()
 
 
 if __name__ == "__main__":